@@ -0,0 +1,187 @@
+"""
+  Random access to records of a FASTA file through a .fai-style index.
+
+  The index has one tab separated line per record, in the same layout that
+  samtools uses:
+    label  sequence_length  byte_offset  bases_per_line  bytes_per_line
+  byte_offset is the position of the first base of the record.  Because every
+  line of a record (except its last) holds the same number of bases, any
+  residue can be located with arithmetic, and a slice of a record is read
+  straight out of a memory map of the file without parsing anything else.
+
+"""
+import mmap
+import os
+import tempfile
+
+from file_readers import read_fasta_file
+
+
+def build_index(filename, index_filename=None):
+  """
+  Scan a FASTA file once and write its .fai index.
+
+  Parameters:
+    filename: path/to/fasta/file
+    index_filename: where to write the index (default: filename + ".fai")
+  Returns:
+    entries: list of [label, length, offset, line_bases, line_width] for every record
+  Raises:
+    ValueError: if a label is repeated or the lines of a record are of unequal width
+  """
+  if index_filename is None:
+    index_filename = filename + ".fai"
+
+  entries = []
+  labels = set()
+  record = None # [label, length, offset, line_bases, line_width] of the current record
+  last_line_seen = False # a short (or blank) line may only end a record
+  offset = 0
+  with open(filename, "rb") as infile:
+    for line in infile:
+      line_width = len(line)
+      if line[:1] == b">":
+        label, _ = read_fasta_file.process_header_line(line.decode(errors="replace").rstrip())
+        if label in labels:
+          raise ValueError("{}: duplicate label {}".format(filename, label))
+        labels.add(label)
+        record = [label, 0, offset + line_width, 0, 0]
+        entries.append(record)
+        last_line_seen = False
+      elif record is not None:
+        bases = len(line.rstrip(b"\r\n"))
+        if line.strip() == b"":
+          last_line_seen = record[1] > 0 # blank lines may separate records
+        elif last_line_seen:
+          raise ValueError("{}: record {} has lines of unequal width".format(filename, record[0]))
+        else:
+          if record[3] == 0: # first line of sequence sets the layout and, past any blank lines, the offset
+            record[2], record[3], record[4] = offset, bases, line_width
+          # the last line of the file may lack its line terminator
+          elif bases > record[3] or (bases == record[3] and line_width != record[4] and line.endswith(b"\n")):
+            raise ValueError("{}: record {} has lines of unequal width".format(filename, record[0]))
+          last_line_seen = bases < record[3]
+          record[1] += bases
+      offset += line_width
+
+  with open(index_filename, "w") as outfile:
+    for entry in entries:
+      outfile.write("\t".join(str(x) for x in entry) + "\n")
+  return entries
+
+
+def read_index(index_filename):
+  """
+  Read a .fai index into a dictionary.
+
+  Parameters:
+    index_filename: path/to/index/file
+  Returns:
+    index: dict mapping label to (length, offset, line_bases, line_width)
+  """
+  index = {}
+  with open(index_filename, "r") as infile:
+    for line in infile:
+      fields = line.rstrip("\n").split("\t")
+      if len(fields) < 5:
+        continue
+      index[fields[0]] = tuple(int(x) for x in fields[1:5])
+  return index
+
+
+class IndexedFastaFile:
+  """
+  Serves records and slices of records of a FASTA file from a memory map.
+
+  The index is built on first use, and rebuilt whenever the FASTA file is newer
+  than its index.  Use as a context manager, or call close() when done.
+
+  Example:
+    with IndexedFastaFile("data/Assignment1Sequences.txt") as fasta:
+      gene = fasta.get("Gene1")
+      first_codons = fasta.get("Gene1", 0, 30)
+  """
+
+  def __init__(self, filename, index_filename=None):
+    if index_filename is None:
+      index_filename = filename + ".fai"
+    if not os.path.exists(index_filename) or \
+        os.path.getmtime(index_filename) < os.path.getmtime(filename):
+      build_index(filename, index_filename)
+    self.filename = filename
+    self.index = read_index(index_filename)
+    self._file = open(filename, "rb")
+    if os.fstat(self._file.fileno()).st_size > 0:
+      self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+    else: # mmap refuses empty files
+      self._map = b""
+
+  def labels(self):
+    return list(self.index)
+
+  def length(self, label):
+    return self.index[label][0]
+
+  def get(self, label, start=None, end=None):
+    """
+    Returns the sequence of a record, or the slice [start, end) of it.
+
+    Parameters:
+      label : name of the record as given by process_header_line
+      start, end : 0-based, end-exclusive positions; Python slice rules apply
+    Returns:
+      sequence : string
+    Raises:
+      KeyError: if the label is not in the index
+    """
+    length, offset, line_bases, line_width = self.index[label]
+    start, end, _ = slice(start, end).indices(length)
+    if end <= start:
+      return ""
+    first = offset + (start // line_bases) * line_width + start % line_bases
+    last = offset + ((end - 1) // line_bases) * line_width + (end - 1) % line_bases
+    return self._map[first:last + 1].translate(None, b"\r\n").decode()
+
+  def close(self):
+    if isinstance(self._map, mmap.mmap):
+      self._map.close()
+    self._file.close()
+
+  def __contains__(self, label):
+    return label in self.index
+
+  def __len__(self):
+    return len(self.index)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.close()
+
+
+def test_build_index():
+  # (file content, expected sequences); the last line may be short, blank or without its newline
+  cases = [
+    (b">a\nACGT\nACGT", {"a": "ACGTACGT"}),
+    (b">a desc\n\nACGTAC\nGTA", {"a": "ACGTACGTA"}),
+    (b">a\n\n\nACG\nTA\n\n>b\nGG\nG\n", {"a": "ACGTA", "b": "GGG"}),
+    (b">a\r\nACGT\r\nAC\r\n", {"a": "ACGTAC"}),
+  ]
+  with tempfile.TemporaryDirectory() as tmpdir:
+    filename = os.path.join(tmpdir, "test.fa")
+    for content, expected in cases:
+      with open(filename, "wb") as outfile:
+        outfile.write(content)
+      build_index(filename)
+      with IndexedFastaFile(filename) as fasta:
+        found = {label: fasta.get(label) for label in fasta.labels()}
+      print(found == expected, found)
+
+
+if __name__ == "__main__":
+  test_build_index()
+  filename = "data/Assignment1Sequences.txt"
+  with IndexedFastaFile(filename) as fasta:
+    for label in fasta.labels():
+      print(label, fasta.length(label), fasta.get(label, 0, 30))
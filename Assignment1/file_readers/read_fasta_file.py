@@ -16,16 +16,18 @@ def process_header_line(line):
     label = header_line.split(' ')[0]
   return label, header_line
 
-def read_file(filename):
+def iter_file(filename):
   """
-  Read in FASTA-format file containing one or more mRNA.
+  Stream a FASTA-format file one record at a time.
+
+  Lines of a record are collected in a list and joined once the record is
+  complete, so memory is bounded by the largest record rather than the file.
 
   Parameters:
     filename: path/to/file/containing/the/data
-  Returns:
-    results: a list of [name, header_line, mRNA] list of every mRNA data
+  Yields:
+    record: [name, header_line, mRNA] list for each mRNA in the file
   """
-  results = []
   with open(filename, "r") as infile:
     # First line is label
     line = infile.readline().rstrip()
@@ -33,21 +35,31 @@ def read_file(filename):
     # Now we process lines that have the sequence
     # There may be blank lines till we reach the next gene
     # This means we need to check each line for ">" tag and continue if we find blank line
-    sequence = "" # the sequence accumulator
+    chunks = [] # the sequence accumulator
     for line in infile:
       line = line.rstrip()
       if line == "":
         continue # go to next line of data
       if line[0] == ">":
-        results.append([label, header_line, sequence])
+        yield [label, header_line, "".join(chunks)]
         # start new gene
         label, header_line = process_header_line(line)
-        sequence = ""
+        chunks = []
         continue # go to the next line which starts the sequence
-      sequence += line # add to develong sequence
+      chunks.append(line) # add to develong sequence
     # the last gene read must be recorded now
-    results.append([label, header_line, sequence])
-  return results
+    yield [label, header_line, "".join(chunks)]
+
+def read_file(filename):
+  """
+  Read in FASTA-format file containing one or more mRNA.
+
+  Parameters:
+    filename: path/to/file/containing/the/data
+  Returns:
+    results: a list of [name, header_line, mRNA] list of every mRNA data
+  """
+  return list(iter_file(filename))
 
 if __name__ == "__main__":
   filename = "data/Assignment1Sequences.txt"
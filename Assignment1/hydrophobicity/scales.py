@@ -0,0 +1,109 @@
+import numpy as np
+
+
+"""
+Registry of hydrophobicity scales.
+
+Each scale maps the one letter code of an amino acid to its hydrophobicity.  Before use a scale is compiled into a
+256-entry float array indexed by the byte of the one letter code, so the values of a whole sequence are looked up
+with one NumPy fancy-index.  Compiled scales are cached, so every scale is compiled once per way of handling unknown
+residues.
+
+Unknown residues (X, B, Z, U, ... or anything else missing from the scale) are handled by the unknown argument:
+  "error" : (default) looking up the residue raises KeyError, as the dictionary scales always did
+  "nan"   : the residue gets NaN; every window containing it has a NaN weighted average and is never picked as a
+            transmembrane region
+  "mean"  : the residue gets the mean value of the scale
+  number  : the residue gets that value
+
+Note that the cutoffs of analyze_hydrophobicity_profile are those of von Heijne for the Kyte-Doolittle scale.
+"""
+
+# Kyte J, Doolittle RF. J. Mol. Biol. (1982) 157, 105-132
+KYTE_DOOLITTLE = {
+  "I": 4.5, "V": 4.2, "L": 3.8, "F": 2.8, "C": 2.5, "M": 1.9, "A": 1.8,
+  "G": -0.4, "T": -0.7, "S": -0.8, "W": -0.9, "Y": -1.3, "P": -1.6,
+  "H": -3.2, "E": -3.5, "Q": -3.5, "D": -3.5, "N": -3.5, "K": -3.9, "R": -4.5,
+}
+
+# Hopp TP, Woods KR. Proc. Natl. Acad. Sci. USA (1981) 78, 3824-3828.  A hydrophilicity scale: positive is hydrophilic.
+HOPP_WOODS = {
+  "R": 3.0, "D": 3.0, "E": 3.0, "K": 3.0, "S": 0.3, "N": 0.2, "Q": 0.2,
+  "G": 0.0, "P": 0.0, "T": -0.4, "A": -0.5, "H": -0.5, "C": -1.0, "M": -1.3,
+  "V": -1.5, "I": -1.8, "L": -1.8, "Y": -2.3, "F": -2.5, "W": -3.4,
+}
+
+# Eisenberg D, Schwarz E, Komaromy M, Wall R. J. Mol. Biol. (1984) 179, 125-142 (normalized consensus scale)
+EISENBERG = {
+  "I": 1.38, "F": 1.19, "V": 1.08, "L": 1.06, "W": 0.81, "M": 0.64, "A": 0.62,
+  "G": 0.48, "C": 0.29, "Y": 0.26, "P": 0.12, "T": -0.05, "S": -0.18, "H": -0.40,
+  "E": -0.74, "N": -0.78, "Q": -0.85, "D": -0.90, "K": -1.50, "R": -2.53,
+}
+
+# Engelman DM, Steitz TA, Goldman A. Annu. Rev. Biophys. Biophys. Chem. (1986) 15, 321-353 (GES scale, kcal/mol)
+GES = {
+  "F": 3.7, "M": 3.4, "I": 3.1, "L": 2.8, "V": 2.6, "C": 2.0, "W": 1.9,
+  "A": 1.6, "T": 1.2, "G": 1.0, "S": 0.6, "P": -0.2, "Y": -0.7, "H": -3.0,
+  "Q": -4.1, "N": -4.8, "E": -8.2, "K": -8.8, "D": -9.2, "R": -12.3,
+}
+
+SCALES = {
+  "kyte-doolittle": KYTE_DOOLITTLE,
+  "hopp-woods": HOPP_WOODS,
+  "eisenberg": EISENBERG,
+  "ges": GES,
+}
+
+DEFAULT_SCALE = "kyte-doolittle"
+
+# Compiled scales keyed by (scale name, unknown)
+_compiled = {}
+
+
+"""
+Adds a user-supplied scale to the registry, replacing any scale of the same name.
+
+Arguments:
+  name : name to refer to the scale by
+  scale : dict mapping one letter amino acid codes to hydrophobicity values
+"""
+def register_scale(name, scale):
+  SCALES[name] = dict(scale)
+  for key in [key for key in _compiled if key[0] == name]:
+    del _compiled[key]
+
+
+"""
+Compiles a hydrophobicity scale into a 256-entry array indexed by the byte of the one letter code of a residue.
+Byte 0, used to pad sequences, is always NaN.
+
+Arguments:
+  scale : name of a registered scale, or a dict mapping one letter amino acid codes to hydrophobicity values
+  unknown : value of residues missing from the scale: "error", "nan", "mean" or a number (see above).  "error" and
+            "nan" both compile to NaN; encode_residues raises the error.
+
+Returns:
+  lookup : numpy float array of size 256
+Raises:
+  KeyError : for a scale name that is not registered
+"""
+def compile_scale(scale=DEFAULT_SCALE, unknown="error"):
+  if isinstance(scale, str):
+    key = (scale, unknown)
+    if key not in _compiled:
+      lookup = compile_scale(SCALES[scale], unknown)
+      lookup.flags.writeable = False # shared by every caller
+      _compiled[key] = lookup
+    return _compiled[key]
+
+  if unknown in ("error", "nan"):
+    fill = np.nan
+  elif unknown == "mean":
+    fill = np.mean(list(scale.values()))
+  else:
+    fill = float(unknown)
+  lookup = np.full(256, fill)
+  for aa, value in scale.items():
+    lookup[ord(aa)] = value
+  lookup[0] = np.nan
+  return lookup
@@ -1,5 +1,7 @@
 import numpy as np
 
+from hydrophobicity import scales
+
 
 # Total size of sliding window for trapezoid rule
 OUTER_SIZE = 10
@@ -46,41 +48,154 @@ def compute_location_weights():
 
 """
 Returns mapping of amino acid character codes to their approximate hydrophobicity mappings based on the Kyte, Doolittle
-study.
+study.  Other scales are registered in the scales module.
 """
 def KD_scale():
-  hydrophobicity = {
-    "I": 4.5, "V": 4.2, "L": 3.8, "F": 2.8, "C": 2.5, "M": 1.9, "A": 1.8,
-    "G"	: -0.4, "T": -0.7, "S": -0.8, "W": -0.9, "Y": -1.3, "P": -1.6,
-    "H": -3.2, "E": -3.5, "Q": -3.5, "D": -3.5, "N": -3.5, "K": -3.9, "R": -4.5,
-  }
-  return hydrophobicity
+  return dict(scales.KYTE_DOOLITTLE)
+
+
+# The weights are computed once and shared by every profile
+LOCATION_WEIGHTS = np.array(compute_location_weights())
 
 
 """
-Uses hydrophobicity scale to build hydrophobicity profile using weighted averages calculated by the trapezoid rule
+Looks up the hydrophobicity of every residue of an amino acid sequence.
 
 Arguments:
   aa_sequence : amino acid sequence
+  scale : (default="kyte-doolittle") name of a registered scale, or a dict of hydrophobicity values
+  unknown : (default="error") how to score residues missing from the scale; see the scales module
 
 Returns:
-  hp : hydrophobicity profile as numpy array
+  hp_vals : numpy array of hydrophobic values, one per residue
+Raises:
+  KeyError : for a residue that is not in the scale, if unknown is "error"
 """
-def build_hydrophobicity_profile(aa_sequence):
-  hydrophobicities = KD_scale()
-  hp_vals = np.array([hydrophobicities[aa] for aa in aa_sequence])
+def encode_residues(aa_sequence, scale=scales.DEFAULT_SCALE, unknown="error"):
+  lookup = scales.compile_scale(scale, unknown)
+  hp_vals = lookup[np.frombuffer(aa_sequence.encode("latin-1", "replace"), dtype=np.uint8)]
+  if unknown == "error":
+    missing = np.flatnonzero(np.isnan(hp_vals))
+    if missing.size:
+      raise KeyError(aa_sequence[missing[0]])
+  return hp_vals
 
-  hp = []
 
-  weights = np.array(compute_location_weights())
+"""
+Packs amino acid sequences into the rows of a 2-D array of residue bytes, padded with byte 0.  A packed set of
+sequences can be profiled with several scales without encoding the sequences again.
+
+Arguments:
+  aa_sequences : list of amino acid sequences
 
-  if len(aa_sequence) >= OUTER_SIZE:
-    for i in range(0, len(hp_vals) - weights.size + 1):
-      hp.append(np.sum(hp_vals[i:i + weights.size].flatten() * weights))
+Returns:
+  residues : 2-D numpy uint8 array with one row per sequence, at least LOCATION_WEIGHTS.size wide
+  lengths : numpy array of the length of each sequence
+"""
+def pack_sequences(aa_sequences):
+  lengths = np.array([len(aa_sequence) for aa_sequence in aa_sequences], dtype=np.intp)
+  width = max(lengths.max(initial=0), LOCATION_WEIGHTS.size)
+
+  # Scatter the residues of all sequences into the padded array in one step
+  packed = np.frombuffer("".join(aa_sequences).encode("latin-1", "replace"), dtype=np.uint8)
+  rows = np.repeat(np.arange(len(aa_sequences)), lengths)
+  cols = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+  residues = np.zeros((len(aa_sequences), width), dtype=np.uint8)
+  residues[rows, cols] = packed
+  return residues, lengths
+
+
+# Number of window values weighted at a time by weighted_window_sums, which bounds its temporary memory
+WINDOW_CHUNK_SIZE = 1 << 20
+
+
+"""
+Computes the trapezoid weighted sum of every window along the last axis of an array of hydrophobic values, for all
+windows at once.
 
+The windows are a strided view of hp_vals; their products with LOCATION_WEIGHTS are reduced by numpy along the last
+axis, the way np.sum reduces the products of a single window, so the profile is the one of the original loop over
+windows.  The windows are weighted a chunk at a time so that no more than WINDOW_CHUNK_SIZE products exist at once.
+
+Arguments:
+  hp_vals : numpy array of hydrophobic values; 1-D for one sequence, 2-D for one sequence per row
+
+Returns:
+  hp : numpy array of the same shape except that the last axis is shorter by LOCATION_WEIGHTS.size - 1
+"""
+def weighted_window_sums(hp_vals):
+  windows = np.lib.stride_tricks.sliding_window_view(hp_vals, LOCATION_WEIGHTS.size, axis=-1)
+  hp = np.empty(windows.shape[:-1])
+  rows = max(int(np.prod(windows.shape[:-2])), 1)
+  step = max(WINDOW_CHUNK_SIZE // (rows * LOCATION_WEIGHTS.size), 1)
+  for start in range(0, windows.shape[-2], step):
+    hp[..., start:start + step] = (windows[..., start:start + step, :] * LOCATION_WEIGHTS).sum(axis=-1)
   return hp
 
 
+"""
+Uses hydrophobicity scale to build hydrophobicity profile using weighted averages calculated by the trapezoid rule
+
+Arguments:
+  aa_sequence : amino acid sequence
+  scale : (default="kyte-doolittle") name of a registered scale, or a dict of hydrophobicity values
+  unknown : (default="error") how to score residues missing from the scale; see the scales module
+
+Returns:
+  hp : hydrophobicity profile as numpy array (empty if the sequence is shorter than the window)
+"""
+def build_hydrophobicity_profile(aa_sequence, scale=scales.DEFAULT_SCALE, unknown="error"):
+  hp_vals = encode_residues(aa_sequence, scale, unknown)
+
+  if len(hp_vals) < LOCATION_WEIGHTS.size:
+    return np.zeros(0)
+
+  return weighted_window_sums(hp_vals)
+
+
+"""
+Builds the hydrophobicity profiles of sequences packed by pack_sequences.  The values of all residues are looked up
+with one fancy-index into the compiled scale, and the weighted sums of all windows of all sequences are computed
+together.
+
+Arguments:
+  residues, lengths : as returned by pack_sequences
+  scale : (default="kyte-doolittle") name of a registered scale, or a dict of hydrophobicity values
+  unknown : (default="error") how to score residues missing from the scale; see the scales module
+
+Returns:
+  hp : 2-D numpy array with one row per sequence.  Row i holds the profile of sequence i in its first
+       lengths[i] - 2 * OUTER_SIZE entries (none if the sequence is shorter than the window) followed by NaN.
+Raises:
+  KeyError : for a residue that is not in the scale, if unknown is "error"
+"""
+def build_packed_profiles(residues, lengths, scale=scales.DEFAULT_SCALE, unknown="error"):
+  hp_vals = scales.compile_scale(scale, unknown)[residues]
+  if unknown == "error":
+    missing = np.argwhere(np.isnan(hp_vals) & (np.arange(residues.shape[1]) < lengths[:, None]))
+    if missing.size:
+      raise KeyError(chr(residues[missing[0][0], missing[0][1]]))
+  return weighted_window_sums(hp_vals)
+
+
+"""
+Builds the hydrophobicity profiles of many amino acid sequences at once.
+
+Arguments:
+  aa_sequences : list of amino acid sequences
+  scale : (default="kyte-doolittle") name of a registered scale, or a dict of hydrophobicity values
+  unknown : (default="error") how to score residues missing from the scale; see the scales module
+
+Returns:
+  hp : 2-D numpy array with one row per sequence, as returned by build_packed_profiles
+Raises:
+  KeyError : for a residue that is not in the scale, if unknown is "error"
+"""
+def build_hydrophobicity_profiles(aa_sequences, scale=scales.DEFAULT_SCALE, unknown="error"):
+  residues, lengths = pack_sequences(aa_sequences)
+  return build_packed_profiles(residues, lengths, scale, unknown)
+
+
 """
 Analyze each string of hydrophibic values and identify regions which are 'certain' transmembrane regions and which are
 'putative' (aka, may or may not be transmembrane regions).
@@ -95,67 +210,103 @@ Returns:
   result : list of 'x' meaning undecided, 'M' definitely inside membrane, 'P' putatively inside membrane
 """
 def analyze_hydrophobicity_profile(hp, upper_cutoff=1, lower_cutoff=.5):
-  # Resultant array
-  result_string = ['x' for i in range(len(hp) + 2 * OUTER_SIZE)]
-
-  # Give each hydrophobic value an index corresponding to their position in the amino acid chain
-  hp_with_index = [[hp[i], i] for i in range(len(hp))]
-
-  # Sort hydrophobicity chain by hydrophobic value, order highest to lowest
-  hp_with_index_sorted = sorted(hp_with_index, reverse=True)
-
-  # Remove any hydrophobic acid from the list with a value less than the lower cutoff
-  hp_with_index_relevant = [x for x in hp_with_index_sorted if x[0] >= lower_cutoff]
-
-  # Work through the list, starting with the highest hydrophobic value.  If the window surrounding the next highest
-  # value doesn't intersect with the window of a value already in our list, add that value to our list.
-  already_done_set = set()
-  hp_with_index_relevant2 = []
-  for item in hp_with_index_relevant:
-    temp_set = set(range(item[1] - OUTER_SIZE, item[1] + OUTER_SIZE))
-    if already_done_set.intersection(temp_set):
-      pass
-    else:
-      already_done_set = already_done_set | temp_set
-      hp_with_index_relevant2.append(item)
-
-  # Recall that our hydrophobic profile is (OUTER_SIZE * 2) smaller than the original amino acid sequence.  This is
-  # because when we built our hyrdrophobic profile, the amino acids within OUTER_SIZE of either edge were left out of
-  # the profile becuase they couldn't be properly measured by our sliding window technique.
-  # Thus, we now increment each index with the value OUTER_SIZE, to get the index of each result as it relates to the
-  # original amino acid sequence.
-  hp_with_true_indices = [[x[0], x[1] + OUTER_SIZE] for x in hp_with_index_relevant2]
-
-  # Sort the certain and potential hydrophobic regions by index positions (i.e. order in which they appear in the
-  # amino acid sequence
-  hp_with_true_indices = sorted(hp_with_true_indices, key = lambda x: x[1])
-
-  # Replace the hydrophobic value of the critical residue with a simple marker indicating certain (M) versus
-  # putative (P)
-  # Replace index of critical residue with index of first residue in window
-  # Add a second index indicating the last residue in the window.
-  for item in hp_with_true_indices:
-    if item[0] >= upper_cutoff:
-      item[0] = 'M'
-    elif item[0] >= lower_cutoff:
-      item[0] = 'P'
-    item[1] -= OUTER_SIZE
-    item.append(item[1] + 2 * OUTER_SIZE)
-
-
-  # Modify the resultant string array to show putative and certain transmembrane regions
-  for item in hp_with_true_indices:
-    if item[0] == 'M':
-      for i in range(item[1], item[2]):
-        result_string[i] = "M"
-    elif item[0] == 'P':
-      for i in range(item[1], item[2]):
-        result_string[i] = "P"
-
-  # Convert resultant string array to string
-  result_string = ''.join(result_string)
-
-  return result_string, hp_with_true_indices
+  hp = np.asarray(hp, dtype=float)
+  span = 2 * OUTER_SIZE
+
+  # Keep the positions with a hydrophobic value of at least the lower cutoff, and order them by hydrophobic value,
+  # highest to lowest.  Ties are broken by the later position first, which is the order sorted(..., reverse=True)
+  # gives to [value, index] pairs.
+  candidates = np.flatnonzero(hp >= lower_cutoff)
+  candidates = candidates[np.lexsort((candidates, hp[candidates]))[::-1]]
+
+  # Work through the list, starting with the highest hydrophobic value.  The window around a position covers
+  # OUTER_SIZE residues on either side, so two windows intersect when their positions are less than span apart.
+  # blocked marks every position whose window would intersect the window of a value already in our list; it is padded
+  # by span on each side so that windows at the edges need no clipping.
+  blocked = np.zeros(len(hp) + 2 * span, dtype=bool)
+  selected = []
+  for i in candidates.tolist():
+    if not blocked[i + span]:
+      blocked[i + 1:i + 2 * span] = True
+      selected.append(i)
+
+  # Each window starts at the index of its critical residue in the profile, which is OUTER_SIZE less than the index of
+  # the residue in the amino acid sequence, and covers span residues.  Sort the regions by their position in the amino
+  # acid sequence and mark them certain (M) or putative (P).
+  hp_with_true_indices = []
+  result_string = bytearray(b"x" * (len(hp) + span))
+  for i in sorted(selected):
+    marker = "M" if hp[i] >= upper_cutoff else "P"
+    hp_with_true_indices.append([marker, i, i + span])
+    result_string[i:i + span] = marker.encode() * span
+
+  return result_string.decode(), hp_with_true_indices
+
+
+"""
+Analyze many hydrophobicity profiles at once; gives the same result as analyze_hydrophobicity_profile for each profile.
+
+The candidate positions of all profiles are ranked within their profile.  Windows are then picked in rounds: round k
+considers the k-th best candidate of every profile at the same time, so each round is a handful of array operations
+no matter how many profiles there are.
+
+Arguments:
+  hp : 2-D array with one profile per row, padded with NaN, as returned by build_hydrophobicity_profiles
+  upper_cutoff : (default=1.0) for definite inside membrane
+  lower_cutoff : (default=0.5) for putative inside membrane
+  lengths : length of each profile (default: number of values in the row that are not NaN; give the lengths when the
+            profiles were built with unknown="nan")
+Returns:
+  results : list of (result_string, segments) per row, as returned by analyze_hydrophobicity_profile
+"""
+def analyze_hydrophobicity_profiles(hp, upper_cutoff=1, lower_cutoff=.5, lengths=None):
+  hp = np.asarray(hp, dtype=float)
+  num_rows, width = hp.shape
+  span = 2 * OUTER_SIZE
+  if lengths is None:
+    lengths = (~np.isnan(hp)).sum(axis=1)
+  lengths = np.asarray(lengths, dtype=np.intp)
+
+  # Candidates of all rows, ordered by row, then by hydrophobic value and position as in the single profile version
+  rows, cols = np.nonzero(hp >= lower_cutoff)
+  inside = cols < lengths[rows]
+  rows, cols = rows[inside], cols[inside]
+  values = hp[rows, cols]
+  order = np.lexsort((-cols, -values, rows))
+  rows, cols, values = rows[order], cols[order], values[order]
+
+  # Rank of each candidate within its row, and the candidates grouped by rank
+  row_starts = np.searchsorted(rows, np.arange(num_rows))
+  ranks = np.arange(len(rows)) - row_starts[rows]
+  by_rank = np.argsort(ranks, kind="stable")
+  round_ends = np.cumsum(np.bincount(ranks, minlength=1))
+
+  blocked = np.zeros((num_rows, width + 2 * span), dtype=bool)
+  overlap = np.arange(1, 2 * span)
+  selected = np.zeros(len(rows), dtype=bool)
+  round_start = 0
+  for round_end in round_ends:
+    members = by_rank[round_start:round_end]
+    members = members[~blocked[rows[members], cols[members] + span]]
+    blocked[rows[members, None], cols[members, None] + overlap] = True
+    selected[members] = True
+    round_start = round_end
+
+  # Mark the selected windows of all rows, then split them into per row strings and segment lists
+  rows, cols, values = rows[selected], cols[selected], values[selected]
+  order = np.lexsort((cols, rows))
+  rows, cols, values = rows[order], cols[order], values[order]
+  markers = np.where(values >= upper_cutoff, ord("M"), ord("P")).astype(np.uint8)
+  result_strings = np.full((num_rows, width + span), ord("x"), dtype=np.uint8)
+  result_strings[rows[:, None], cols[:, None] + np.arange(span)] = markers[:, None]
+
+  results = []
+  bounds = np.searchsorted(rows, np.arange(num_rows + 1))
+  for row in range(num_rows):
+    segments = [[chr(marker), col, col + span] for marker, col in
+                zip(markers[bounds[row]:bounds[row + 1]].tolist(), cols[bounds[row]:bounds[row + 1]].tolist())]
+    results.append((result_strings[row, :lengths[row] + span].tobytes().decode(), segments))
+  return results
 
 
 """
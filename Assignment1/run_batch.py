@@ -0,0 +1,180 @@
+from file_readers import read_fasta_file
+from translate import translate
+from hydrophobicity import trapezoid_rule_based_profile
+from hydrophobicity import scales
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+import numpy as np
+import argparse
+import json
+import os
+import sys
+
+"""
+BIOINFORMATICS - Assignment 1
+
+Headless batch driver for large FASTA files.  Performs the same tasks as run.py without plotting:
+
+  Streams gene sequences from a FASTA file in chunks.
+  Translates each chunk, computes the hydrophobicity profiles and predicts the transmembrane regions of all genes in the
+  chunk together, spreading the chunks over a pool of worker processes.
+  Writes one line per gene, in the order of the FASTA file, as soon as its chunk is done.
+
+Usage (from the Assignment1 directory):
+  python run_batch.py data/Assignment1Sequences.txt --output predictions.tsv --workers 8 --chunk-size 1000
+"""
+
+
+"""
+Groups records into lists of chunk_size records.
+"""
+def chunked(records, chunk_size):
+  chunk = []
+  for record in records:
+    chunk.append(record)
+    if len(chunk) == chunk_size:
+      yield chunk
+      chunk = []
+  if chunk:
+    yield chunk
+
+
+"""
+Translates and analyzes one chunk of genes.  Runs in a worker process.
+
+Arguments:
+  chunk : list of [label, header_line, mRNA]
+  scale : name of a registered hydrophobicity scale
+  unknown : how to score residues missing from the scale; see the scales module
+
+Returns:
+  rows : list of dict, one per gene, with the label, the amino acid sequence, the nucleotide errors, the predicted
+         transmembrane segments and the prediction string ('x' undecided, 'M' membrane, 'P' putative membrane).
+         A gene whose amino acid sequence cannot be profiled has prediction None and the reason in error.
+"""
+def process_chunk(chunk, scale=scales.DEFAULT_SCALE, unknown="error"):
+  translations = translate.translate_batch([record[2] for record in chunk])
+  aa_sequences = [aminoacid_sequence for aminoacid_sequence, _ in translations]
+
+  # Profile the whole chunk with residues missing from the scale scored as NaN, then report the genes that have one as
+  # errors; the other genes are analyzed together
+  residues, lengths = trapezoid_rule_based_profile.pack_sequences(aa_sequences)
+  errors = [None] * len(chunk)
+  if unknown == "error":
+    hp = trapezoid_rule_based_profile.build_packed_profiles(residues, lengths, scale, "nan")
+    unknown_residues = np.isnan(scales.compile_scale(scale, "nan")[residues]) & \
+        (np.arange(residues.shape[1]) < lengths[:, None])
+    for row, col in zip(*np.nonzero(unknown_residues)):
+      if errors[row] is None: # the first unknown residue of the gene
+        errors[row] = "unknown residue {!r}".format(aa_sequences[row][col])
+  else:
+    hp = trapezoid_rule_based_profile.build_packed_profiles(residues, lengths, scale, unknown)
+
+  good = np.array([error is None for error in errors], dtype=bool)
+  profile_lengths = np.maximum(lengths - 2 * trapezoid_rule_based_profile.OUTER_SIZE, 0)
+  good_predictions = iter(trapezoid_rule_based_profile.analyze_hydrophobicity_profiles(
+    hp[good], lengths=profile_lengths[good]))
+  predictions = [next(good_predictions) if error is None else (None, []) for error in errors]
+
+  rows = []
+  for record, (aminoacid_sequence, nucleotide_errors), (prediction, segments), error in \
+      zip(chunk, translations, predictions, errors):
+    rows.append({
+      "label": record[0],
+      "aminoacid_sequence": aminoacid_sequence,
+      "nucleotide_errors": nucleotide_errors,
+      "segments": segments,
+      "prediction": prediction,
+      "error": error,
+    })
+  return rows
+
+
+TSV_COLUMNS = ["label", "aminoacid_sequence", "nucleotide_errors", "segments", "prediction", "error"]
+
+
+def write_tsv_row(outfile, row):
+  fields = [
+    row["label"],
+    row["aminoacid_sequence"],
+    ",".join("{}:{}".format(position, codon) for position, codon in row["nucleotide_errors"]),
+    ",".join("{}:{}-{}".format(*segment) for segment in row["segments"]),
+    row["prediction"] or "",
+    row["error"] or "",
+  ]
+  outfile.write("\t".join(fields) + "\n")
+
+
+def write_jsonl_row(outfile, row):
+  outfile.write(json.dumps(row) + "\n")
+
+
+"""
+Streams the records of a FASTA file through translation, hydrophobicity profiling and transmembrane prediction.
+
+Arguments:
+  filename : path/to/fasta/file
+  outfile : open text file for the results
+  output_format : "tsv" or "jsonl"
+  workers : number of worker processes; 1 runs everything in this process
+  chunk_size : number of genes handed to a worker at a time
+  scale : name of a registered hydrophobicity scale
+  unknown : how to score residues missing from the scale; see the scales module
+
+Returns:
+  count : number of genes written
+"""
+def run_batch(filename, outfile, output_format="tsv", workers=None, chunk_size=1000, scale=scales.DEFAULT_SCALE,
+              unknown="error"):
+  write_row = write_tsv_row if output_format == "tsv" else write_jsonl_row
+  if output_format == "tsv":
+    outfile.write("\t".join(TSV_COLUMNS) + "\n")
+
+  chunks = chunked(read_fasta_file.iter_file(filename), chunk_size)
+  count = 0
+  if workers == 1:
+    for chunk in chunks:
+      for row in process_chunk(chunk, scale, unknown):
+        write_row(outfile, row)
+        count += 1
+    return count
+
+  workers = workers or os.cpu_count() or 1
+  with ProcessPoolExecutor(max_workers=workers) as executor:
+    # Keep a bounded number of chunks in flight so memory does not grow with the file; write them back in order
+    max_pending = 2 * workers
+    pending = deque()
+    for chunk in chunks:
+      pending.append(executor.submit(process_chunk, chunk, scale, unknown))
+      if len(pending) >= max_pending:
+        for row in pending.popleft().result():
+          write_row(outfile, row)
+          count += 1
+    while pending:
+      for row in pending.popleft().result():
+        write_row(outfile, row)
+        count += 1
+  return count
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Predict transmembrane regions of every gene in a FASTA file.")
+  parser.add_argument("fasta_file", help="FASTA file of mRNA sequences")
+  parser.add_argument("-o", "--output", help="output file (default: standard output)")
+  parser.add_argument("-f", "--format", choices=["tsv", "jsonl"], default="tsv", help="output format (default: tsv)")
+  parser.add_argument("-w", "--workers", type=int, default=None,
+                      help="number of worker processes (default: number of CPUs)")
+  parser.add_argument("-c", "--chunk-size", type=int, default=1000, help="genes per chunk (default: 1000)")
+  parser.add_argument("-s", "--scale", choices=sorted(scales.SCALES), default=scales.DEFAULT_SCALE,
+                      help="hydrophobicity scale (default: {})".format(scales.DEFAULT_SCALE))
+  parser.add_argument("-u", "--unknown", default="error",
+                      help="score of residues missing from the scale: error, nan, mean or a number (default: error)")
+  args = parser.parse_args()
+  unknown = args.unknown if args.unknown in ("error", "nan", "mean") else float(args.unknown)
+
+  if args.output:
+    with open(args.output, "w") as outfile:
+      count = run_batch(args.fasta_file, outfile, args.format, args.workers, args.chunk_size, args.scale, unknown)
+  else:
+    count = run_batch(args.fasta_file, sys.stdout, args.format, args.workers, args.chunk_size, args.scale, unknown)
+  print("{} genes processed".format(count), file=sys.stderr)
@@ -0,0 +1,139 @@
+import numpy as np
+
+from translate import translate
+
+"""
+Finds open reading frames (ORFs) in all three forward frames of a sequence and, for DNA, in the three frames of its
+reverse complement.
+
+An ORF runs from an AUG to the first in-frame stop codon after it.  Only the longest ORF ending at each stop codon is
+reported, i.e. an AUG inside an ORF does not start a second, nested ORF.  ORFs that run off the end of the sequence
+without reaching a stop codon are not reported.
+
+Instead of translating each frame, the codon index of every position of the sequence is computed at once, which
+covers the three frames in one pass.  Every start codon is then paired with the next stop codon of its frame by a
+binary search, and only the ORFs long enough to report are translated.
+"""
+
+# DNA and lower case input are read with T for U
+SCAN_LOOKUP = translate.build_nucleotide_lookup()
+SCAN_LOOKUP[ord("T")] = SCAN_LOOKUP[ord("U")]
+SCAN_LOOKUP[np.frombuffer(b"acgut", dtype=np.uint8)] = SCAN_LOOKUP[np.frombuffer(b"ACGUT", dtype=np.uint8)]
+
+# Codon index 64 marks a codon with an invalid nucleotide; it translates to '*' as in translate_simple
+SCAN_CODON_TABLE = np.append(translate.CODON_TABLE, np.uint8(ord("*")))
+START_CODON = 16 * translate.NUCLEOTIDES.index("A") + 4 * translate.NUCLEOTIDES.index("U") + \
+              translate.NUCLEOTIDES.index("G")
+IS_STOP_CODON = SCAN_CODON_TABLE == ord("_")
+
+
+"""
+Computes the codon index of the codon starting at every position of an encoded sequence.
+Parameters:
+    codes : numpy uint8 array made with SCAN_LOOKUP
+Returns:
+    index : numpy array of len(codes) - 2 codon indices; 64 where the codon has an invalid nucleotide
+"""
+
+
+def codon_indices(codes):
+    if len(codes) < 3:
+        return np.zeros(0, dtype=np.intp)
+    first, second, third = codes[:-2], codes[1:-1], codes[2:]
+    index = 16 * first.astype(np.intp) + 4 * second + third
+    invalid = (first == translate.INVALID_NUCLEOTIDE) | (second == translate.INVALID_NUCLEOTIDE) | \
+              (third == translate.INVALID_NUCLEOTIDE)
+    index[invalid] = 64
+    return index
+
+
+"""
+Finds the ORFs of one strand.
+Parameters:
+    codes : numpy uint8 array made with SCAN_LOOKUP
+    min_length : minimum number of amino acids of a reported ORF (stop codon excluded)
+Returns:
+    orfs : list of (frame, start, end, protein) on this strand, ordered by start; end is one past the stop codon
+"""
+
+
+def find_strand_orfs(codes, min_length):
+    n = len(codes)
+    index = codon_indices(codes)
+    # Order positions frame by frame so that one binary search pairs each start codon with the next stop of its frame
+    starts = np.flatnonzero(index == START_CODON)
+    stops = np.flatnonzero(IS_STOP_CODON[index])
+    start_keys = (starts % 3) * n + starts
+    stop_order = np.argsort((stops % 3) * n + stops, kind="stable")
+    stops = stops[stop_order]
+    stop_keys = (stops % 3) * n + stops
+    start_order = np.argsort(start_keys, kind="stable")
+    starts, start_keys = starts[start_order], start_keys[start_order]
+
+    next_stop = np.searchsorted(stop_keys, start_keys)
+    has_stop = next_stop < len(stops)
+    starts, next_stop = starts[has_stop], next_stop[has_stop]
+    ends = stops[next_stop]
+    in_frame = ends % 3 == starts % 3
+    starts, next_stop, ends = starts[in_frame], next_stop[in_frame], ends[in_frame]
+    # The first start before each stop gives the longest ORF
+    _, first = np.unique(next_stop, return_index=True)
+    starts, ends = starts[first], ends[first]
+    long_enough = (ends - starts) // 3 >= min_length
+    starts, ends = starts[long_enough], ends[long_enough]
+
+    orfs = []
+    for start, end in sorted(zip(starts.tolist(), ends.tolist())):
+        protein = SCAN_CODON_TABLE[index[start:end:3]].tobytes().decode("ascii")
+        orfs.append((start % 3, start, end + 3, protein))
+    return orfs
+
+
+"""
+Finds the ORFs of a sequence in all frames.
+Parameters:
+    sequence : RNA (AUGC) or DNA (ATGC) string, either case
+    min_length : (default=30) minimum number of amino acids of a reported ORF (stop codon excluded)
+    dna : scan the reverse complement too; by default, a sequence without U is taken to be DNA
+Returns:
+    orfs : list of (strand, frame, start, end, protein) ordered by strand and start.  strand is '+' or '-';
+        start and end are 0-based, end-exclusive positions on the given sequence and include the stop codon;
+        for '-' ORFs frame is counted from the start of the reverse complement.
+"""
+
+
+def find_orfs(sequence, min_length=30, dna=None):
+    if dna is None:
+        dna = "U" not in sequence and "u" not in sequence
+    codes = SCAN_LOOKUP[np.frombuffer(sequence.encode("latin-1", "replace"), dtype=np.uint8)]
+    orfs = [("+",) + orf for orf in find_strand_orfs(codes, min_length)]
+    if dna:
+        n = len(codes)
+        # Complement is 3 - code in ACGU order; invalid nucleotides stay invalid
+        complement = np.where(codes < translate.INVALID_NUCLEOTIDE, 3 - codes, codes).astype(np.uint8)
+        for frame, start, end, protein in find_strand_orfs(complement[::-1], min_length):
+            orfs.append(("-", frame, n - end, n - start, protein))
+    return orfs
+
+
+"""
+Streams the ORFs of FASTA records, one record at a time.
+Parameters:
+    records : iterable of [label, header_line, sequence], e.g. read_fasta_file.iter_file(filename)
+    min_length, dna : as in find_orfs
+Yields:
+    (label, orfs) for every record, orfs as returned by find_orfs
+"""
+
+
+def scan_records(records, min_length=30, dna=None):
+    for record in records:
+        yield record[0], find_orfs(record[2], min_length, dna)
+
+
+if __name__ == "__main__":
+    from file_readers import read_fasta_file
+
+    for label, orfs in scan_records(read_fasta_file.iter_file("data/Assignment1Sequences.txt"), min_length=100):
+        for orf in orfs:
+            print(label, *orf[:4], len(orf[4]))
@@ -1,5 +1,12 @@
+import numpy as np
+
 from translate import genetic_code
 
+# Order of nucleotides in a codon index: codon XYZ has index 16 * X + 4 * Y + Z
+NUCLEOTIDES = "ACGU"
+# Code given to any character that is not one of NUCLEOTIDES
+INVALID_NUCLEOTIDE = len(NUCLEOTIDES)
+
 """
 Translates gene sequence into amino acid sequence
 Assumptions:
@@ -32,3 +39,111 @@ def translate_simple(mRNA):
             nucleotide_errors.append((i + 1, mRNA[i:i + 3]))
 
     return aminoacid_sequence[:-1], nucleotide_errors
+
+
+"""
+Builds a 256-entry array mapping a character (as a byte) to its position in nucleotides. Every other byte maps to
+INVALID_NUCLEOTIDE.
+Parameters:
+    nucleotides : string of the four nucleotides in codon index order
+Returns:
+    lookup : numpy uint8 array of size 256
+"""
+
+
+def build_nucleotide_lookup(nucleotides=NUCLEOTIDES):
+    lookup = np.full(256, INVALID_NUCLEOTIDE, dtype=np.uint8)
+    for i, nucleotide in enumerate(nucleotides):
+        lookup[ord(nucleotide)] = i
+    return lookup
+
+
+"""
+Builds a 64-entry array mapping a codon index to the byte of its one letter amino acid code ('_' for stop codons).
+Returns:
+    table : numpy uint8 array of size 64
+"""
+
+
+def build_codon_table():
+    table = np.zeros(64, dtype=np.uint8)
+    for codon, aminoacid in genetic_code.genetic_code().items():
+        x, y, z = (NUCLEOTIDES.index(nucleotide) for nucleotide in codon)
+        table[16 * x + 4 * y + z] = ord(aminoacid)
+    return table
+
+
+# Compiled once; shared by every call of the vectorized translator
+NUCLEOTIDE_LOOKUP = build_nucleotide_lookup()
+CODON_TABLE = build_codon_table()
+
+
+"""
+Encodes a nucleotide string as an array of positions in NUCLEOTIDES.
+Parameters:
+    sequence : string
+    lookup : array made by build_nucleotide_lookup
+Returns:
+    codes : numpy uint8 array of the same length as sequence
+"""
+
+
+def encode_nucleotides(sequence, lookup=NUCLEOTIDE_LOOKUP):
+    return lookup[np.frombuffer(sequence.encode("latin-1", "replace"), dtype=np.uint8)]
+
+
+"""
+Translates many mRNA sequences at once; the result for every mRNA is identical to that of translate_simple.
+All sequences are encoded into one uint8 array, split into codons, and mapped through CODON_TABLE in a single
+vectorized step; the first stop codon of each sequence is then found with a binary search.
+Parameters:
+    mRNAs : list of strings consisting of characters: AUGC
+Returns:
+    results : list of (aminoacid_sequence, nucleotide_errors), one per mRNA, as returned by translate_simple
+"""
+
+
+def translate_batch(mRNAs):
+    # Pad every sequence to whole codons; the padding is invalid so a partial last codon is an error as before
+    num_codons = np.array([(len(mRNA) + 2) // 3 for mRNA in mRNAs], dtype=np.intp)
+    ends = np.cumsum(num_codons)
+    starts = ends - num_codons
+    padded = b"".join(mRNA.encode("latin-1", "replace").ljust(3 * n, b"?") for mRNA, n in zip(mRNAs, num_codons))
+    codes = NUCLEOTIDE_LOOKUP[np.frombuffer(padded, dtype=np.uint8)].reshape(-1, 3)
+
+    # Codon index of every codon of every sequence, then amino acids by table lookup
+    valid = (codes < INVALID_NUCLEOTIDE).all(axis=1)
+    index = 16 * codes[:, 0].astype(np.intp) + 4 * codes[:, 1] + codes[:, 2]
+    aminoacids = np.where(valid, CODON_TABLE[np.where(valid, index, 0)], ord("*")).astype(np.uint8)
+    aminoacid_bytes = aminoacids.tobytes()
+
+    # First stop codon at or after the start of each sequence
+    stops = np.flatnonzero(valid & (aminoacids == ord("_")))
+    errors = np.flatnonzero(~valid)
+    next_stop = np.searchsorted(stops, starts)
+    first_stop = np.append(stops, ends[-1] if len(ends) else 0)[next_stop]
+    stopped = first_stop < ends
+    # translate_simple drops the last character, whether it is the stop codon or not
+    protein_ends = np.where(stopped, first_stop, np.maximum(ends - 1, starts))
+    error_ends = np.searchsorted(errors, np.where(stopped, first_stop, ends))
+    error_starts = np.searchsorted(errors, starts)
+
+    results = []
+    for k, mRNA in enumerate(mRNAs):
+        start = starts[k]
+        aminoacid_sequence = aminoacid_bytes[start:protein_ends[k]].decode("ascii")
+        nucleotide_errors = []
+        for codon in errors[error_starts[k]:error_ends[k]]:
+            i = 3 * int(codon - start)
+            nucleotide_errors.append((i + 1, mRNA[i:i + 3]))
+        results.append((aminoacid_sequence, nucleotide_errors))
+    return results
+
+
+"""
+Vectorized drop-in replacement of translate_simple for a single mRNA.
+"""
+
+
+def translate_vectorized(mRNA):
+    return translate_batch([mRNA])[0]
@@ -1,27 +1,107 @@
 import csv
+import os
 
-def ambiguity_codes(filename='ambiguity_codes.csv'):
-    """
-    Read in ambiguity_codes.csv
-    """
-    codes = {}
-    with open(filename) as csvfile:
-        csv_reader_handle = csv.reader(csvfile, delimiter='\t')
-        header_row = True
-        for row in csv_reader_handle:
-            if header_row: # skip the header row in the csv file
-                header_row = False
-                continue
-            row[0] = row[0].rstrip()
-            row[1] = row[1].rstrip().replace(' or ', ',').split(',')
-            row[1] = [item for item in row[1] if len(item)!= 0]
-            key = row[0]
-            value = row[1]
-            codes[key] = value
-    return codes
+import numpy as np
+
+# The table shipped next to this module
+AMBIGUITY_CODES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ambiguity_codes.csv')
+
+# Bit of each nucleotide in an ambiguity mask; a code matches every
+# nucleotide whose bit is set, so two codes can stand for the same
+# nucleotide exactly when their masks share a bit (mask_a & mask_b != 0)
+NUCLEOTIDE_BITS = {"A": 1, "C": 2, "G": 4, "T": 8}
+
+_parsed_files = {} # ambiguity codes of every file read, by absolute path
+
+def ambiguity_codes(filename=AMBIGUITY_CODES_FILE):
+    """
+    Read in ambiguity_codes.csv. Each file is parsed once.
+    """
+    path = os.path.abspath(filename)
+    if path not in _parsed_files:
+        codes = {}
+        with open(filename) as csvfile:
+            csv_reader_handle = csv.reader(csvfile, delimiter='\t')
+            header_row = True
+            for row in csv_reader_handle:
+                if header_row: # skip the header row in the csv file
+                    header_row = False
+                    continue
+                row[0] = row[0].rstrip()
+                row[1] = row[1].rstrip().replace(' or ', ',').split(',')
+                row[1] = [item for item in row[1] if len(item)!= 0]
+                key = row[0]
+                value = row[1]
+                codes[key] = value
+        _parsed_files[path] = codes
+    return {key: list(value) for key, value in _parsed_files[path].items()}
+
+def ambiguity_bitmasks(filename=AMBIGUITY_CODES_FILE):
+    """
+    Compiles the ambiguity codes into bitmasks with A=1, C=2, G=4, T=8.
+    Returns:
+        masks : dict code -> mask; codes that stand for no nucleotide (gap) are left out
+    """
+    masks = {}
+    for code, nucleotides in ambiguity_codes(filename).items():
+        mask = 0
+        for nucleotide in nucleotides:
+            mask |= NUCLEOTIDE_BITS.get(nucleotide.strip(), 0)
+        if mask:
+            masks[code] = mask
+    return masks
+
+def build_mask_lookup(masks):
+    """
+    Returns:
+        lookup : numpy uint8 array of size 256, byte of a code -> its mask (0 if not a code)
+    """
+    lookup = np.zeros(256, dtype=np.uint8)
+    for code, mask in masks.items():
+        if len(code) == 1 and ord(code) < 256:
+            lookup[ord(code)] = mask
+    return lookup
+
+# Compiled once from ambiguity_codes.csv
+AMBIGUITY_MASKS = ambiguity_bitmasks()
+MASK_LOOKUP = build_mask_lookup(AMBIGUITY_MASKS)
+MASK_LOOKUP.flags.writeable = False
+# The code that stands for each mask, e.g. MASK_CODES[5] == "R" (A or G)
+MASK_CODES = [None] * 16
+for _code, _mask in AMBIGUITY_MASKS.items():
+    MASK_CODES[_mask] = _code
+
+def mask_sequence(X):
+    """
+    Parameters:
+        X : str of nucleotides and ambiguity codes
+    Returns:
+        masks : numpy uint8 array of the mask of each character
+    Raises:
+        KeyError : for a character that is not an ambiguity code
+    """
+    masks = MASK_LOOKUP[np.frombuffer(X.encode("latin-1", "replace"), dtype=np.uint8)]
+    invalid = np.flatnonzero(masks == 0)
+    if invalid.size:
+        raise KeyError(X[invalid[0]])
+    return masks
+
+def codes_match(a, b):
+    """
+    True if ambiguity codes a and b can stand for the same nucleotide, e.g. R and A.
+    """
+    return bool(MASK_LOOKUP[ord(a)] & MASK_LOOKUP[ord(b)])
+
+def is_valid_sequence(X):
+    """
+    True if every character of X is a nucleotide or an ambiguity code.
+    """
+    if not X:
+        return False
+    return bool(MASK_LOOKUP[np.frombuffer(X.encode("latin-1", "replace"), dtype=np.uint8)].all())
 
 if __name__ == "__main__":
     codes = ambiguity_codes()
     print(codes)
-
+    print(AMBIGUITY_MASKS)
 
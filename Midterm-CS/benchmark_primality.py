@@ -0,0 +1,85 @@
+########################################################################
+# Benchmark of the AKS test against Miller-Rabin                       #
+# For every bit size, times both tests on random primes (the slowest   #
+# inputs of both, as no early exit applies) and on random odd          #
+# composites, and checks that the tests agree. Use it to pick the test #
+# that certifies rolling-hash moduli of a given size.                  #
+########################################################################
+
+import argparse
+import json
+import random
+import time
+
+from test_primality_AKS import aks_is_prime
+from number_theory import is_prime, random_prime
+
+def random_composite(bits, rng):
+  """
+  A random odd composite of exactly the given number of bits.
+  """
+  while True:
+    n = rng.randrange(1 << (bits - 1), 1 << bits) | 1
+    if not is_prime(n):
+      return n
+
+def time_test(test, numbers):
+  """
+  Returns:
+    seconds : average time of test over numbers
+    results : list of bool, test(n) for each n
+  """
+  start = time.perf_counter()
+  results = [test(n) for n in numbers]
+  return (time.perf_counter() - start) / len(numbers), results
+
+def benchmark(bit_sizes, samples=5, seed=0):
+  """
+  Arguments:
+    bit_sizes : list of integers, each >= 3
+    samples : number of primes and of composites per bit size
+    seed : seed of the random numbers
+  Returns:
+    rows : list of dict, one per bit size and kind of number, with the average seconds of both tests
+  Raises:
+    AssertionError : if the tests disagree on some number
+  """
+  rng = random.Random(seed)
+  rows = []
+  for bits in bit_sizes:
+    numbers = {
+      "prime": [random_prime(bits, rng) for _ in range(samples)],
+      "composite": [random_composite(bits, rng) for _ in range(samples)],
+    }
+    for kind, ns in numbers.items():
+      aks_seconds, aks_results = time_test(aks_is_prime, ns)
+      mr_seconds, mr_results = time_test(is_prime, ns)
+      assert aks_results == mr_results, "tests disagree on {}".format(ns)
+      rows.append({
+        "bits": bits,
+        "kind": kind,
+        "samples": samples,
+        "aks_seconds": aks_seconds,
+        "miller_rabin_seconds": mr_seconds,
+      })
+  return rows
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Time the AKS test against Miller-Rabin over a range of bit sizes.")
+  parser.add_argument("-b", "--bits", type=int, nargs="+", default=[8, 12, 16, 20, 24],
+                      help="bit sizes to test (default: 8 12 16 20 24)")
+  parser.add_argument("-n", "--samples", type=int, default=5, help="numbers of each kind per bit size (default: 5)")
+  parser.add_argument("-s", "--seed", type=int, default=0)
+  parser.add_argument("--json", action="store_true", help="print the rows as JSON")
+  args = parser.parse_args()
+
+  rows = benchmark(args.bits, args.samples, args.seed)
+  if args.json:
+    print(json.dumps(rows, indent=2))
+  else:
+    print("bits\tkind\taks_seconds\tmiller_rabin_seconds\tratio")
+    for row in rows:
+      print("{}\t{}\t{:.6f}\t{:.6f}\t{:.0f}".format(row["bits"], row["kind"], row["aks_seconds"],
+                                                  row["miller_rabin_seconds"],
+                                                  row["aks_seconds"] / row["miller_rabin_seconds"]))
@@ -1,3 +1,8 @@
+import numpy as np
+
+# Order of nucleotides in the cost arrays
+NUCLEOTIDES = "ACGT"
+
 def deletion_insertion_and_substitution_costs():
     deletion_costs = {
         "A": 1, "T": 1, "G": 1, "C": 1
@@ -16,4 +21,83 @@ def deletion_insertion_and_substitution_costs():
         # Self subs
         "A-by-A" : 0, "G-by-G" : 0, "T-by-T" : 0, "C-by-C" : 0
     }
-    return deletion_costs, insertion_costs, substitution_costs    
\ No newline at end of file
+    return deletion_costs, insertion_costs, substitution_costs
+
+_cost_arrays = None
+
+def cost_arrays():
+    """
+    The costs of deletion_insertion_and_substitution_costs() as integer arrays
+    indexed by the position of a nucleotide in NUCLEOTIDES. Built once.
+    Returns:
+        deletion : array of 4 deletion costs
+        insertion : array of 4 insertion costs
+        substitution : 4x4 array, substitution[x, y] is the cost of "x-by-y"
+    """
+    global _cost_arrays
+    if _cost_arrays is None:
+        deletion_costs, insertion_costs,\
+             substitution_costs = deletion_insertion_and_substitution_costs()
+        deletion = np.array([deletion_costs[x] for x in NUCLEOTIDES], dtype=np.int64)
+        insertion = np.array([insertion_costs[y] for y in NUCLEOTIDES], dtype=np.int64)
+        substitution = np.array([[substitution_costs[x+"-by-"+y] for y in NUCLEOTIDES]
+                                 for x in NUCLEOTIDES], dtype=np.int64)
+        for costs in (deletion, insertion, substitution):
+            costs.flags.writeable = False # shared by every caller
+        _cost_arrays = deletion, insertion, substitution
+    return _cost_arrays
+
+# Byte of a nucleotide -> its position in NUCLEOTIDES; 255 for anything else
+NUCLEOTIDE_CODES = np.full(256, 255, dtype=np.uint8)
+for i, x in enumerate(NUCLEOTIDES):
+    NUCLEOTIDE_CODES[ord(x)] = i
+
+def encode_sequence(X):
+    """
+    Parameters:
+        X : str of nucleotides ACGT
+    Returns:
+        codes : numpy uint8 array of positions in NUCLEOTIDES
+    Raises:
+        KeyError : for a character that has no costs, as the cost dictionaries do
+    """
+    codes = NUCLEOTIDE_CODES[np.frombuffer(X.encode("latin-1", "replace"), dtype=np.uint8)]
+    invalid = np.flatnonzero(codes == 255)
+    if invalid.size:
+        raise KeyError(X[invalid[0]])
+    return codes
+
+_ambiguous_cost_arrays = None
+
+def ambiguous_cost_arrays():
+    """
+    The costs indexed by ambiguity mask (A=1, C=2, G=4, T=8, the bit of a
+    nucleotide being 1 << its position in NUCLEOTIDES; see ambiguity_codes).
+    Deleting or inserting an ambiguous base costs as much as the cheapest
+    nucleotide it stands for. Two codes that share a nucleotide
+    (mask_x & mask_y != 0) substitute for free; otherwise the cheapest
+    substitution between the nucleotides they stand for is charged.
+    The masks are ANDed once here, so aligners only index the table. Built once.
+    Returns:
+        deletion : array of 16 deletion costs
+        insertion : array of 16 insertion costs
+        substitution : 16x16 array, substitution[mask_x, mask_y]
+    """
+    global _ambiguous_cost_arrays
+    if _ambiguous_cost_arrays is None:
+        deletion, insertion, substitution = cost_arrays()
+        members = [[i for i in range(len(NUCLEOTIDES)) if mask >> i & 1] for mask in range(16)]
+        ambiguous_deletion = np.zeros(16, dtype=np.int64)
+        ambiguous_insertion = np.zeros(16, dtype=np.int64)
+        ambiguous_substitution = np.zeros((16, 16), dtype=np.int64)
+        for mask_x in range(1, 16):
+            ambiguous_deletion[mask_x] = deletion[members[mask_x]].min()
+            ambiguous_insertion[mask_x] = insertion[members[mask_x]].min()
+            for mask_y in range(1, 16):
+                if mask_x & mask_y == 0:
+                    ambiguous_substitution[mask_x, mask_y] = \
+                        substitution[np.ix_(members[mask_x], members[mask_y])].min()
+        for costs in (ambiguous_deletion, ambiguous_insertion, ambiguous_substitution):
+            costs.flags.writeable = False # shared by every caller
+        _ambiguous_cost_arrays = ambiguous_deletion, ambiguous_insertion, ambiguous_substitution
+    return _ambiguous_cost_arrays
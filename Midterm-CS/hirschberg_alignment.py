@@ -0,0 +1,140 @@
+########################################################################
+# Hirschberg's divide-and-conquer alignment.                           #
+# Finds an optimal edit script of X into Y with the costs of           #
+# deletion_insertion_and_substitution_costs() in O(N+M) memory:        #
+# the middle row of X is matched to the column of Y where the forward  #
+# and the backward score rows add up to the least, and the two halves  #
+# are aligned recursively. Small blocks use the full table.            #
+########################################################################
+
+import numpy as np
+
+from deletion_insertion_and_substitution_costs import NUCLEOTIDES
+from ambiguity_codes import MASK_CODES
+from min_edit_distance import edit_distance_last_row, encode_with_costs
+
+# Blocks with at most this many table cells are aligned with a full table
+BLOCK_CELLS = 4096
+
+def align_block(x, y, deletion, insertion, substitution):
+    """
+    Aligns a small block with a full table and a traceback. Ties are broken
+    as in min_edit_distance: deletion, then insertion, then substitution.
+    Parameters:
+        x, y : encoded sequences (lists of codes)
+        deletion, insertion, substitution : cost arrays from cost_arrays() or ambiguous_cost_arrays()
+    Returns:
+        script : list of (operation, x code or None, y code or None)
+    """
+    N = len(x)
+    M = len(y)
+    D = [[0 for j in range(M+1)] for i in range(N+1)]
+    for i in range(1, N+1):
+        D[i][0] = D[i-1][0] + deletion[x[i-1]]
+    for j in range(1, M+1):
+        D[0][j] = D[0][j-1] + insertion[y[j-1]]
+    for i in range(1, N+1):
+        del_cost = deletion[x[i-1]]
+        sub_costs = substitution[x[i-1]]
+        previous, current = D[i-1], D[i]
+        for j in range(1, M+1):
+            current[j] = min(previous[j] + del_cost,
+                             current[j-1] + insertion[y[j-1]],
+                             previous[j-1] + sub_costs[y[j-1]])
+
+    script = []
+    i, j = N, M
+    while i > 0 or j > 0:
+        if i > 0 and D[i][j] == D[i-1][j] + deletion[x[i-1]]:
+            script.append(("del", x[i-1], None))
+            i -= 1
+        elif j > 0 and D[i][j] == D[i][j-1] + insertion[y[j-1]]:
+            script.append(("ins", None, y[j-1]))
+            j -= 1
+        else:
+            script.append(("sub", x[i-1], y[j-1]))
+            i -= 1
+            j -= 1
+    return script[::-1]
+
+def hirschberg(x, y, deletion, insertion, substitution, script):
+    """
+    Appends an optimal edit script of x into y to script.
+    Parameters:
+        x, y : encoded sequences (numpy arrays of codes)
+        deletion, insertion, substitution : cost arrays from cost_arrays() or ambiguous_cost_arrays()
+        script : list to extend
+    """
+    N = len(x)
+    M = len(y)
+    if N <= 1 or M <= 1 or N*M <= BLOCK_CELLS:
+        script.extend(align_block(x.tolist(), y.tolist(), deletion.tolist(),
+                                  insertion.tolist(), substitution.tolist()))
+        return
+    mid = N // 2
+    forward = edit_distance_last_row(x[:mid], y, deletion, insertion, substitution)
+    backward = edit_distance_last_row(x[mid:][::-1], y[::-1], deletion, insertion, substitution)
+    split = int(np.argmin(forward + backward[::-1]))
+    hirschberg(x[:mid], y[:split], deletion, insertion, substitution, script)
+    hirschberg(x[mid:], y[split:], deletion, insertion, substitution, script)
+
+def hirschberg_alignment(X, Y, ambiguous=False):
+    """
+    Parameters:
+        X : str, (source) string to be changed to Y
+        Y : str, target string
+        ambiguous : bool, allow IUPAC ambiguity codes such as N, R or Y
+    Returns:
+        cost : int, the minimum edit distance, D[N][M] of min_edit_distance(X, Y)
+        script : list of edits in the notation of min_edit_distance's path,
+                 e.g. ["sub A-by-A", "del C", "ins G", "sub T-by-C"]
+    """
+    x, y, deletion, insertion, substitution = encode_with_costs(X, Y, ambiguous)
+    letters = MASK_CODES if ambiguous else NUCLEOTIDES
+    edits = []
+    hirschberg(x, y, deletion, insertion, substitution, edits)
+
+    cost = 0
+    script = []
+    for operation, xi, yj in edits:
+        if operation == "del":
+            cost += int(deletion[xi])
+            script.append("del " + letters[xi])
+        elif operation == "ins":
+            cost += int(insertion[yj])
+            script.append("ins " + letters[yj])
+        else:
+            cost += int(substitution[xi, yj])
+            script.append("sub " + letters[xi] + "-by-" + letters[yj])
+    return cost, script
+
+def format_alignment(script):
+    """
+    Parameters:
+        script : edit script returned by hirschberg_alignment
+    Returns:
+        top, bottom : str, the two aligned sequences with "-" for gaps
+    """
+    top = []
+    bottom = []
+    for edit in script:
+        if edit.startswith("del "):
+            top.append(edit[4])
+            bottom.append("-")
+        elif edit.startswith("ins "):
+            top.append("-")
+            bottom.append(edit[4])
+        else:
+            top.append(edit[4])
+            bottom.append(edit[-1])
+    return "".join(top), "".join(bottom)
+
+
+if __name__ == "__main__":
+    X = "ATGCATTAGCA"
+    Y = "ATGCAGTTCA"
+    cost, script = hirschberg_alignment(X, Y)
+    print(cost, script)
+    top, bottom = format_alignment(script)
+    print(top)
+    print(bottom)
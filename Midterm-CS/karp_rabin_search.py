@@ -0,0 +1,184 @@
+########################################################################
+# Karp-Rabin string matching for many motifs at once                   #
+# Every window of a sequence gets a fingerprint: its characters read   #
+# as the digits of a number in base BASE, modulo a prime. A motif can  #
+# only occur where the fingerprint of the window equals the            #
+# fingerprint of the motif; those hits are verified character by       #
+# character. The fingerprints of all windows come from prefix sums of  #
+# the sequence, in O(n) for every motif length, and motifs of equal    #
+# length share one pass over the sequence.                             #
+########################################################################
+
+import numpy as np
+
+from read_fafsa_file import iter_file
+from number_theory import random_prime
+
+# Largest prime below 2**31: a fingerprint times BASE plus a byte stays
+# below 2**62, so the arithmetic never overflows int64
+MODULUS = 2147483647
+BASE = 257
+
+def random_modulus(rng=None):
+  """
+  A random 31-bit prime to use instead of MODULUS, so that no fixed input can
+  be built to make many windows collide with a motif.
+  Arguments:
+    rng : random.Random to draw from (default: the random module)
+  """
+  return random_prime(31, rng)
+
+def encode(sequence):
+  """
+  Returns the bytes of sequence as a numpy uint8 array.
+  """
+  return np.frombuffer(sequence.encode("latin-1", "replace"), dtype=np.uint8)
+
+def powers(x, count, modulus=MODULUS):
+  """
+  Arguments:
+    x : integer
+    count : number of powers
+  Returns:
+    p : numpy int64 array, p[k] = x**k modulo modulus, built by doubling the
+        table: p[size + j] = p[j] * x**size, in about log2(count) array operations
+  """
+  p = np.ones(count, dtype=np.int64)
+  size, step = 1, x % modulus # step is x**size
+  while size < count:
+    end = min(2 * size, count)
+    p[size:end] = p[:end - size] * step % modulus
+    step = step * step % modulus
+    size *= 2
+  return p
+
+def hash_tables(codes, base=BASE, modulus=MODULUS):
+  """
+  The tables all window fingerprints of a sequence are computed from.
+  With t[j] = sum of codes[k] * base**-k for k < j, the fingerprint of
+  codes[i:i+length] is (t[i+length] - t[i]) * base**(i+length-1), all
+  modulo the prime modulus, whatever the length.
+  Arguments:
+    codes : array of character codes, as returned by encode; fewer than 2**32 of them,
+            so that the prefix sums stay in int64
+  Returns:
+    t : numpy int64 array of len(codes) + 1 prefix sums
+    p : numpy int64 array of the powers of base, as returned by powers
+  """
+  inverse = pow(base, -1, modulus)
+  t = np.zeros(len(codes) + 1, dtype=np.int64)
+  np.cumsum(codes * powers(inverse, len(codes), modulus) % modulus, out=t[1:])
+  t %= modulus
+  return t, powers(base, len(codes), modulus)
+
+def fingerprint(codes, base=BASE, modulus=MODULUS):
+  """
+  Karp-Rabin fingerprint of one string.
+  Arguments:
+    codes : array of character codes, as returned by encode
+  Returns:
+    h : integer, sum of codes[k] * base**(len-1-k) modulo modulus
+  """
+  h = 0
+  for c in codes.tolist():
+    h = (h * base + c) % modulus
+  return h
+
+def window_fingerprints(codes, length, base=BASE, modulus=MODULUS, tables=None):
+  """
+  Karp-Rabin fingerprints of every window of the given length.
+  The rolling update h(i+1) = (h(i) - c(i) * base**(length-1)) * base + c(i+length)
+  is inherently sequential; the prefix sums of hash_tables give the same
+  fingerprints for all windows at once, with a few array operations over
+  the sequence whatever the length.
+  Arguments:
+    codes : array of character codes, as returned by encode
+    length : window length
+    tables : hash_tables(codes, base, modulus), to share between lengths (default: computed here)
+  Returns:
+    h : numpy int64 array, h[i] is the fingerprint of codes[i:i+length]
+  """
+  n = len(codes) - length + 1
+  if n <= 0:
+    return np.zeros(0, dtype=np.int64)
+  t, p = tables if tables is not None else hash_tables(codes, base, modulus)
+  # both factors are below modulus < 2**31, so the product fits in int64
+  return (t[length:] - t[:n]) % modulus * p[length - 1:] % modulus
+
+def search_motifs(sequence, motifs, base=BASE, modulus=MODULUS):
+  """
+  Finds every occurrence of every motif in a sequence.
+  Arguments:
+    sequence : string to search
+    motifs : iterable of strings; matching is exact and case sensitive
+    base, modulus : fingerprint parameters; modulus must be a prime below 2**31 that does not divide base
+  Returns:
+    hits : dictionary motif -> numpy array of the 0-based start positions of its occurrences
+  """
+  codes = encode(sequence)
+  by_length = {}
+  for motif in motifs:
+    if not motif:
+      raise ValueError("motifs must not be empty")
+    by_length.setdefault(len(motif), set()).add(motif)
+
+  tables = hash_tables(codes, base, modulus)
+  hits = {}
+  for length, group in by_length.items():
+    group = sorted(group)
+    motif_codes = [encode(motif) for motif in group]
+    motif_hashes = np.array([fingerprint(c, base, modulus) for c in motif_codes], dtype=np.int64)
+    order = np.argsort(motif_hashes, kind="stable")
+    sorted_hashes = motif_hashes[order]
+
+    h = window_fingerprints(codes, length, base, modulus, tables)
+    if len(h) == 0:
+      for motif in group:
+        hits[motif] = np.zeros(0, dtype=np.intp)
+      continue
+
+    # Positions whose fingerprint is the fingerprint of some motif of this length
+    slot = np.minimum(np.searchsorted(sorted_hashes, h), len(sorted_hashes) - 1)
+    candidates = np.flatnonzero(sorted_hashes[slot] == h)
+    candidate_hashes = h[candidates]
+    windows = np.lib.stride_tricks.sliding_window_view(codes, length)
+
+    # Verify the candidates of each motif character by character
+    for k in order.tolist():
+      positions = candidates[candidate_hashes == motif_hashes[k]]
+      if len(positions):
+        positions = positions[(windows[positions] == motif_codes[k]).all(axis=1)]
+      hits[group[k]] = positions
+  return hits
+
+def search_file(filename, motifs, base=BASE, modulus=MODULUS):
+  """
+  Streams a FASTA file and searches every sequence for the motifs.
+  Sequences are upper case (see read_fafsa_file), so motifs should be too.
+  Arguments:
+    filename : path to the FASTA file
+    motifs : iterable of strings
+  Yields:
+    label, hits : for each sequence, hits as returned by search_motifs
+  """
+  motifs = list(motifs)
+  for label, _, sequence in iter_file(filename):
+    yield label, search_motifs(sequence, motifs, base, modulus)
+
+def promoter_motifs(promoters):
+  """
+  Arguments:
+    promoters : list of [name, consensus, score], as returned by input_data_from_console
+  Returns:
+    motifs : dictionary name -> consensus sequence
+  """
+  return {name: consensus for name, consensus, _ in promoters}
+
+
+if __name__ == "__main__":
+  # promoters = input_data_from_console() # to type in the consensus sequences
+  promoters = [["TATA_BOX", "TATAAA", 1.0], ["ECORI", "GAATTC", 1.0], ["CAAT_BOX", "GGCCAATCT", 1.0]]
+  motifs = promoter_motifs(promoters)
+  for label, hits in search_file("MidCS1.txt", motifs.values()):
+    for name, consensus in motifs.items():
+      print(label, name, hits[consensus])
@@ -1,4 +1,8 @@
+import numpy as np
+
 from deletion_insertion_and_substitution_costs import deletion_insertion_and_substitution_costs
+from deletion_insertion_and_substitution_costs import cost_arrays, ambiguous_cost_arrays, encode_sequence
+from ambiguity_codes import mask_sequence
 
 def min_edit_distance(X, Y):
     """
@@ -45,6 +49,76 @@ def min_edit_distance(X, Y):
 
     return D, path
 
+# Cost of cells outside the band; large, but safe to add costs to
+OUT_OF_BAND = 2**62
+
+def banded_edit_distance(X, Y, max_cost=None, band=None, ambiguous=False):
+    """
+    Minimum edit distance computed only on the cells with |i - j| <= band,
+    in O(band) memory and O(band * N) time.
+    A path that ends |i - j| = d off the diagonal has made at least d gaps, so
+    with max_cost given the default band, max_cost // (cheapest gap cost),
+    holds every path that could cost max_cost or less, and the result is exact.
+    With only a band given the result is the best path inside the band, which
+    is the edit distance whenever an optimal path stays inside it.
+    Parameters:
+        X : str, (source) string to be changed to Y
+        Y : str, target string
+        max_cost : int, give up as soon as every cell of a row costs more
+        band : int, cells more than band off the diagonal are not computed
+        ambiguous : bool, allow IUPAC ambiguity codes such as N, R or Y
+    Returns:
+        cost : int, the edit distance, or None if it exceeds max_cost (or if
+               no path stays inside the band)
+    """
+    x, y, deletion, insertion, substitution = encode_with_costs(X, Y, ambiguous)
+    N = len(x)
+    M = len(y)
+    min_gap_cost = int(min(deletion.min(), insertion.min()))
+    if band is None:
+        if max_cost is None or min_gap_cost == 0:
+            band = max(N, M)
+        else:
+            band = max_cost // min_gap_cost
+    if abs(N-M) > band:
+        return None
+    if max_cost is not None and abs(N-M)*min_gap_cost > max_cost:
+        return None
+
+    inserted = np.zeros(M+1, dtype=np.int64)
+    np.cumsum(insertion[y], out=inserted[1:])
+    substitution_rows = substitution[:, y]
+
+    # row holds D[i][lo..hi] of the current row
+    lo, hi = 0, min(M, band)
+    row = inserted[lo:hi+1].copy()
+    for i in range(1, N+1):
+        xi = x[i-1]
+        prev_lo, prev_hi, prev = lo, hi, row
+        lo, hi = max(0, i-band), min(M, i+band)
+        best = np.full(hi-lo+1, OUT_OF_BAND, dtype=np.int64)
+        # deletion: from D[i-1][j]
+        start, stop = max(lo, prev_lo), min(hi, prev_hi)
+        if start <= stop:
+            best[start-lo:stop-lo+1] = prev[start-prev_lo:stop-prev_lo+1] + deletion[xi]
+        # substitution: from D[i-1][j-1]
+        start, stop = max(lo, prev_lo+1, 1), min(hi, prev_hi+1)
+        if start <= stop:
+            np.minimum(best[start-lo:stop-lo+1],
+                       prev[start-1-prev_lo:stop-prev_lo] + substitution_rows[xi, start-1:stop],
+                       out=best[start-lo:stop-lo+1])
+        # insertion: from D[i][j-1], a running minimum along the row
+        best -= inserted[lo:hi+1]
+        row = np.minimum.accumulate(best)
+        row += inserted[lo:hi+1]
+        if max_cost is not None and row.min() > max_cost:
+            return None
+
+    cost = int(row[M-lo])
+    if cost >= OUT_OF_BAND or (max_cost is not None and cost > max_cost):
+        return None
+    return cost
+
 def print_path(path):
     i = len(path)-1
     j = len(path[0])-1
@@ -65,6 +139,64 @@ def print_path(path):
 
 
 
+def edit_distance_last_row(x, y, deletion, insertion, substitution):
+    """
+    Score-only edit distance that keeps a single row of the table.
+    Row i of the table is computed from row i-1 with whole-row array operations.
+    Deletions and substitutions only need row i-1; the insertions along row i
+    are a running minimum: with C[j] the cost of inserting Y[:j],
+        D[i][j] = C[j] + min over k <= j of (T[k] - C[k])
+    where T[k] is the best of a deletion or a substitution into cell (i, k).
+    Parameters:
+        x, y : encoded sequences (arrays of codes)
+        deletion, insertion : arrays of costs indexed by code
+        substitution : 2-D array of costs, substitution[x, y]
+    Returns:
+        row : int64 array, the last row D[N][0..M] of the edit distance matrix
+    """
+    inserted = np.zeros(len(y)+1, dtype=np.int64)
+    np.cumsum(insertion[y], out=inserted[1:])
+    substitution_rows = substitution[:, y] # one row of costs per code of x
+    row = inserted.copy()
+    best = np.empty_like(row)
+    for xi in x.tolist():
+        del_cost = deletion[xi]
+        best[0] = row[0] + del_cost
+        np.minimum(row[1:] + del_cost, row[:-1] + substitution_rows[xi], out=best[1:])
+        best -= inserted
+        np.minimum.accumulate(best, out=row)
+        row += inserted
+    return row
+
+def encode_with_costs(X, Y, ambiguous=False):
+    """
+    Encodes two sequences together with the cost arrays that go with the encoding.
+    Parameters:
+        X, Y : str
+        ambiguous : if True, X and Y may hold IUPAC ambiguity codes and are
+                    encoded as bitmasks (see ambiguous_cost_arrays)
+    Returns:
+        x, y, deletion, insertion, substitution
+    Raises:
+        KeyError : for a character that has no costs
+    """
+    if ambiguous:
+        return (mask_sequence(X), mask_sequence(Y)) + ambiguous_cost_arrays()
+    return (encode_sequence(X), encode_sequence(Y)) + cost_arrays()
+
+def min_edit_distance_score(X, Y, ambiguous=False):
+    """
+    Minimum edit distance of X and Y without the table or the path, in O(M) memory.
+    Parameters:
+        X : str, (source) string to be changed to Y
+        Y : str, target string
+        ambiguous : bool, allow IUPAC ambiguity codes such as N, R or Y
+    Returns:
+        cost : int, D[N][M] of min_edit_distance(X, Y)
+    """
+    row = edit_distance_last_row(*encode_with_costs(X, Y, ambiguous))
+    return int(row[-1])
+
 if __name__ == "__main__":
     X = "ATGCA"
     Y = "ATGCA"
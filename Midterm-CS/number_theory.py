@@ -0,0 +1,227 @@
+########################################################################
+# Number theory for picking hash moduli                                #
+# Deterministic Miller-Rabin for 64-bit integers, a cached segmented   #
+# sieve for small primes, Pollard's rho (Brent's variant) for          #
+# factoring and exact integer totients.                                #
+########################################################################
+
+import math
+import random
+
+import numpy as np
+
+# Miller-Rabin with these bases is exact for every n < 3.18 * 10**23, so for
+# all 64-bit integers (Jiang and Deng, 2014)
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+
+# Length of the segments sieved at a time
+SEGMENT_SIZE = 1 << 16
+
+# Primes found so far by small_primes, and the bound they are complete up to
+_primes = np.array([2, 3, 5, 7], dtype=np.int64)
+_primes_limit = 10
+
+def sieve_segment(low, high, base_primes):
+  """
+  Sieves the segment [low, high).
+  Arguments:
+    low, high : integers, 2 <= low < high
+    base_primes : numpy array holding every prime up to sqrt(high)
+  Returns:
+    primes : numpy int64 array of the primes in [low, high)
+  """
+  is_prime = np.ones(high - low, dtype=bool)
+  for p in base_primes.tolist():
+    if p * p >= high:
+      break
+    start = max(p * p, (low + p - 1) // p * p)
+    is_prime[start - low::p] = False
+  return np.flatnonzero(is_prime).astype(np.int64) + low
+
+def small_primes(limit):
+  """
+  All primes up to limit. The sieve is extended segment by segment and kept,
+  so later calls with a smaller or equal limit cost a binary search.
+  Arguments:
+    limit : integer
+  Returns:
+    primes : read-only numpy int64 array of the primes p <= limit
+  """
+  global _primes, _primes_limit
+  if limit > _primes_limit:
+    # the base primes must reach sqrt(limit); they are found the same way
+    small_primes(math.isqrt(limit) + 1)
+    segments = [_primes]
+    low = _primes_limit + 1
+    while low <= limit:
+      high = min(low + SEGMENT_SIZE, limit + 1)
+      segments.append(sieve_segment(low, high, _primes))
+      low = high
+    _primes = np.concatenate(segments)
+    _primes.flags.writeable = False
+    _primes_limit = limit
+  return _primes[:np.searchsorted(_primes, limit, side="right")]
+
+def primes_between(low, high):
+  """
+  Segmented sieve of an arbitrary range, without caching it.
+  Arguments:
+    low, high : integers
+  Returns:
+    primes : numpy int64 array of the primes in [low, high)
+  """
+  low = max(low, 2)
+  if high <= low:
+    return np.zeros(0, dtype=np.int64)
+  base_primes = small_primes(math.isqrt(high) + 1)
+  segments = [np.zeros(0, dtype=np.int64)]
+  while low < high:
+    top = min(low + SEGMENT_SIZE, high)
+    segments.append(sieve_segment(low, top, base_primes))
+    low = top
+  return np.concatenate(segments)
+
+def is_prime(n):
+  """
+  Primality test: trial division by the bases, then Miller-Rabin with them.
+  Deterministic for n < 3.18 * 10**23, a strong probable-prime test above.
+  Arguments:
+    n : integer
+  Returns:
+    bool, whether n is prime
+  """
+  if n < 2:
+    return False
+  for p in MILLER_RABIN_BASES:
+    if n % p == 0:
+      return n == p
+  d = n - 1
+  s = 0
+  while d % 2 == 0:
+    d //= 2
+    s += 1
+  for a in MILLER_RABIN_BASES:
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+      continue
+    for _ in range(s - 1):
+      x = x * x % n
+      if x == n - 1:
+        break
+    else:
+      return False # a witnesses that n is composite
+  return True
+
+def pollard_rho(n, seed=None):
+  """
+  Finds a non-trivial factor of a composite n with Brent's variant of
+  Pollard's rho: the products of about 128 differences are collected before
+  a gcd is taken, and the collection is replayed one step at a time if it
+  overshoots to n.
+  Arguments:
+    n : odd composite integer
+    seed : seed of the random starting points
+  Returns:
+    d : integer, 1 < d < n, dividing n
+  """
+  rng = random.Random(seed)
+  batch = 128
+  while True:
+    c = rng.randrange(1, n)
+    y = rng.randrange(0, n)
+    g = r = q = 1
+    while g == 1:
+      x = y
+      for _ in range(r):
+        y = (y * y + c) % n
+      k = 0
+      while k < r and g == 1:
+        ys = y
+        for _ in range(min(batch, r - k)):
+          y = (y * y + c) % n
+          q = q * abs(x - y) % n
+        g = math.gcd(q, n)
+        k += batch
+      r *= 2
+    if g == n:
+      g = 1
+      while g == 1:
+        ys = (ys * ys + c) % n
+        g = math.gcd(abs(x - ys), n)
+    if g != n:
+      return g
+    # the cycle closed without separating the factors; try another polynomial
+
+def factorize(n):
+  """
+  Factors n: trial division by the primes below 1000, then Pollard's rho.
+  Arguments:
+    n : positive integer
+  Returns:
+    factors : list of [prime, exponent], sorted by prime, as prime_factors of test_primality_AKS
+  """
+  counts = {}
+  for p in small_primes(1000).tolist():
+    if p * p > n:
+      break
+    while n % p == 0:
+      counts[p] = counts.get(p, 0) + 1
+      n //= p
+  stack = [n] if n > 1 else []
+  while stack:
+    m = stack.pop()
+    if is_prime(m):
+      counts[m] = counts.get(m, 0) + 1
+      continue
+    root = math.isqrt(m)
+    if root * root == m:
+      stack += [root, root]
+      continue
+    d = pollard_rho(m)
+    stack += [d, m // d]
+  return [[p, counts[p]] for p in sorted(counts)]
+
+def euler_totient(n):
+  """
+  Exact Euler's totient: phi(n) = Product(p**k|n) p**(k-1) (p-1)
+  """
+  result = 1
+  for p, k in factorize(n):
+    result *= p ** (k - 1) * (p - 1)
+  return result
+
+def next_prime(n):
+  """
+  Returns the smallest prime >= n.
+  """
+  if n <= 2:
+    return 2
+  n |= 1
+  while not is_prime(n):
+    n += 2
+  return n
+
+def random_prime(bits, rng=None):
+  """
+  A random prime of exactly the given number of bits, e.g. a fresh modulus
+  for a rolling hash so that no fixed input collides on purpose.
+  Arguments:
+    bits : integer >= 2
+    rng : random.Random to draw from (default: the random module)
+  Returns:
+    p : prime, 2**(bits-1) <= p < 2**bits
+  """
+  rng = rng or random
+  while True:
+    p = rng.randrange(1 << (bits - 1), 1 << bits) | 1
+    if is_prime(p):
+      return p
+
+
+if __name__ == "__main__":
+  n = 234567892309567825
+  print("{} = {}".format(n, factorize(n)))
+  print("phi({}) = {}".format(n, euler_totient(n)))
+  print("primes up to 100:", small_primes(100))
+  print("next prime after 2**61:", next_prime(2**61))
+  print("random 31-bit prime:", random_prime(31))
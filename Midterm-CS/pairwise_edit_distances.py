@@ -0,0 +1,184 @@
+########################################################################
+# All pairwise minimum edit distances of the sequences of a FASTA file #
+# Only the upper triangle is computed; pairs are split into shards     #
+# that worker processes score with min_edit_distance_score and write   #
+# into the upper triangle of a shared memory-mapped N x N matrix.      #
+# Cells not yet computed hold NOT_COMPUTED, so the matrix file itself  #
+# is the checkpoint: run again with the same file to resume an         #
+# interrupted run. The lower triangle is mirrored from the upper one   #
+# once every pair is scored.                                           #
+########################################################################
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from read_fafsa_file import get_valid_sequences
+from min_edit_distance import min_edit_distance_score
+
+NOT_COMPUTED = -1
+
+def open_distance_matrix(matrix_file, labels):
+    """
+    Opens the distance matrix of a run, creating it if needed. The labels are
+    kept in matrix_file + ".json" and must match when a run is resumed.
+    Parameters:
+        matrix_file : path of the raw int64 matrix
+        labels : list of sequence labels, in matrix order
+    Returns:
+        D : numpy memmap of shape (N, N), opened for update
+    Raises:
+        ValueError : if matrix_file belongs to a run over other sequences
+    """
+    N = len(labels)
+    labels_file = matrix_file + ".json"
+    if os.path.exists(matrix_file) and os.path.exists(labels_file):
+        with open(labels_file) as infile:
+            saved = json.load(infile)
+        if saved["labels"] != labels:
+            raise ValueError("{} was computed for other sequences".format(matrix_file))
+        return np.memmap(matrix_file, dtype=np.int64, mode="r+", shape=(N, N))
+
+    D = np.memmap(matrix_file, dtype=np.int64, mode="w+", shape=(N, N))
+    D[:] = NOT_COMPUTED
+    np.fill_diagonal(D, 0)
+    D.flush()
+    with open(labels_file, "w") as outfile:
+        json.dump({"labels": labels}, outfile)
+    return D
+
+def remaining_shards(D, pairs_per_shard):
+    """
+    Splits the pairs (i, j), i < j, that are not computed yet into shards.
+    Parameters:
+        D : distance matrix
+        pairs_per_shard : int, about how many pairs a worker gets at a time
+    Returns:
+        shards : list of shards, each a list of (i, j_start, j_stop) row segments
+    """
+    N = D.shape[0]
+    shards = []
+    shard = []
+    size = 0
+    for i in range(N-1):
+        todo = np.flatnonzero(D[i, i+1:] == NOT_COMPUTED) + i+1
+        if todo.size == 0:
+            continue
+        # contiguous runs of columns still to do
+        breaks = np.flatnonzero(np.diff(todo) != 1) + 1
+        for run in np.split(todo, breaks):
+            for j_start in range(int(run[0]), int(run[-1])+1, pairs_per_shard):
+                j_stop = min(j_start+pairs_per_shard, int(run[-1])+1)
+                shard.append((i, j_start, j_stop))
+                size += j_stop - j_start
+                if size >= pairs_per_shard:
+                    shards.append(shard)
+                    shard = []
+                    size = 0
+    if shard:
+        shards.append(shard)
+    return shards
+
+# State of a worker process, set by init_worker
+_sequences = None
+_D = None
+
+def init_worker(sequences, matrix_file):
+    global _sequences, _D
+    _sequences = sequences
+    N = len(sequences)
+    _D = np.memmap(matrix_file, dtype=np.int64, mode="r+", shape=(N, N))
+
+def score_shard(shard):
+    """
+    Scores the pairs of a shard and writes them to (i, j), i < j.
+    Returns:
+        count : number of pairs scored
+    """
+    count = 0
+    for i, j_start, j_stop in shard:
+        for j in range(j_start, j_stop):
+            _D[i, j] = min_edit_distance_score(_sequences[i], _sequences[j])
+        count += j_stop - j_start
+    _D.flush()
+    return count
+
+def mirror_upper_triangle(D, tile=1024):
+    """
+    Copies the upper triangle of D into its lower triangle, one tile of
+    tile x tile cells at a time so that memory use does not grow with N.
+    Copying again is harmless, so a run killed while mirroring is mended
+    by the next one.
+    """
+    N = D.shape[0]
+    for start in range(0, N, tile):
+        stop = min(start+tile, N)
+        for column in range(0, start, tile): # tiles left of the diagonal
+            D[start:stop, column:column+tile] = D[column:column+tile, start:stop].T
+        block = np.array(D[start:stop, start:stop])
+        lower = np.tril_indices(stop-start, -1)
+        block[lower] = block.T[lower]
+        D[start:stop, start:stop] = block
+    D.flush()
+
+def pairwise_edit_distances(sequences, labels, matrix_file, workers=None, pairs_per_shard=1000):
+    """
+    Parameters:
+        sequences : list of str, sequences of ACGT
+        labels : list of str, one label per sequence
+        matrix_file : path of the matrix; an existing one is resumed
+        workers : number of worker processes; 1 runs in this process
+        pairs_per_shard : int, pairs handed to a worker at a time
+    Returns:
+        D : numpy memmap (N x N) of minimum edit distances
+    """
+    if not sequences:
+        return np.zeros((0, 0), dtype=np.int64)
+    D = open_distance_matrix(matrix_file, labels)
+    shards = remaining_shards(D, pairs_per_shard)
+    if workers == 1:
+        init_worker(sequences, matrix_file)
+        for shard in shards:
+            score_shard(shard)
+    elif shards:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(sequences, matrix_file)) as executor:
+            for _ in executor.map(score_shard, shards):
+                pass
+    mirror_upper_triangle(D)
+    return np.memmap(matrix_file, dtype=np.int64, mode="r", shape=D.shape)
+
+def pairwise_edit_distances_from_file(filename, matrix_file, valid_chars=("A", "T", "G", "C"),
+                                      workers=None, pairs_per_shard=1000):
+    """
+    Pairwise minimum edit distances of the valid sequences of a FASTA file.
+    Parameters:
+        filename : string - path-to-fafsa-file
+        matrix_file, workers, pairs_per_shard : as in pairwise_edit_distances
+        valid_chars : sequences with other characters are left out
+    Returns:
+        labels : list of labels of the valid sequences, in matrix order
+        D : numpy memmap (N x N) of minimum edit distances
+    """
+    valid_sequences, _ = get_valid_sequences(filename, list(valid_chars))
+    labels = [item[0] for item in valid_sequences]
+    sequences = [item[2] for item in valid_sequences]
+    D = pairwise_edit_distances(sequences, labels, matrix_file, workers, pairs_per_shard)
+    return labels, D
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pairwise minimum edit distances of the sequences of a FASTA file.")
+    parser.add_argument("fasta_file")
+    parser.add_argument("matrix_file", help="int64 N x N matrix; resumed if it exists")
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("-p", "--pairs-per-shard", type=int, default=1000)
+    args = parser.parse_args()
+
+    labels, D = pairwise_edit_distances_from_file(args.fasta_file, args.matrix_file,
+                                                  workers=args.workers, pairs_per_shard=args.pairs_per_shard)
+    print(labels)
+    print(np.asarray(D))
@@ -9,6 +9,8 @@
 # 5. Repeated till end of file
 ########################################################################
 
+import numpy as np
+
 def process_header_line(line):
   """
   Parses header line for the gene and extracts name of the gene. The header line starts with a identifying character '>', followed by label and then other information, which we do not use but keep them around.
@@ -24,16 +26,18 @@ def process_header_line(line):
     label = header_line.split(' ')[0]
   return label, header_line
 
-def read_file(filename):
+def iter_file(filename):
   """
-  Read in FASTA-format file containing one or more sequences
+  Stream a FASTA-format file one sequence at a time.
+
+  Lines of a sequence are collected in a list and joined once the sequence is
+  complete, so memory is bounded by the largest sequence rather than the file.
 
   Parameters:
     filename: path/to/file/containing/the/data
-  Returns:
-    results: a list of [label, full header_line, DNA or RNA or AA-seq string] list of every mRNA data
+  Yields:
+    record: [label, full header_line, DNA or RNA or AA-seq string] for each sequence
   """
-  results = []
   with open(filename, "r") as infile:
     # find the first line that has label of the gene
     line = "*" # dummy char to get the while loop started
@@ -44,29 +48,90 @@ def read_file(filename):
     # Now we process lines that have the sequence
     # There may be blank lines till we reach the next gene
     # This means we need to check each line for ">" tag and continue if we find blank line
-    sequence = "" # the sequence accumulator
+    chunks = [] # the sequence accumulator
     for line in infile:
       line = line.rstrip()
       if line == "":
         continue # go to next line of data
       if line[0] == ">":
-        results.append([label, header_line, sequence])
+        yield [label, header_line, "".join(chunks)]
         # start new gene
         label, header_line = process_header_line(line)
-        sequence = ""
+        chunks = []
         continue # go to the next line which starts the sequence
-      sequence += line.upper() # add to develong sequence
+      chunks.append(line.upper()) # add to develong sequence
     # the last gene read must be recorded now
-    results.append([label, header_line, sequence])
-  return results
+    yield [label, header_line, "".join(chunks)]
+
+def read_file(filename):
+  """
+  Read in FASTA-format file containing one or more sequences
+
+  Parameters:
+    filename: path/to/file/containing/the/data
+  Returns:
+    results: a list of [label, full header_line, DNA or RNA or AA-seq string] list of every mRNA data
+  """
+  return list(iter_file(filename))
 
 def contains_only_valid_chars(sequence, valid_chars):
+  """
+  Tests a sequence for valid characters by deleting every valid character from its bytes in one bytes.translate call.
+  Parameters:
+    sequence : string
+    valid_chars : list (or string) of valid chars
+  Returns:
+    True if the sequence is not empty and has only valid chars
+  """
   if not sequence:
     return False
-  for letter in sequence:
-    if letter not in valid_chars:
-      return False
-  return True
+  deletechars = "".join(valid_chars).encode("latin-1", "replace")
+  return not sequence.encode("latin-1", "replace").translate(None, deletechars)
+
+def build_valid_lookup(valid_chars):
+  """
+  Parameters:
+    valid_chars : list (or string) of valid chars
+  Returns:
+    valid_lookup : numpy bool array of size 256, True at the byte of every valid char
+  """
+  valid_lookup = np.zeros(256, dtype=bool)
+  valid_lookup[np.frombuffer("".join(valid_chars).encode("latin-1", "replace"), dtype=np.uint8)] = True
+  return valid_lookup
+
+def find_invalid_chars(sequence, valid_lookup):
+  """
+  Parameters:
+    sequence : string
+    valid_lookup : numpy bool array made by build_valid_lookup
+  Returns:
+    positions : numpy array of the 0-based positions of the invalid chars of the sequence
+  """
+  codes = np.frombuffer(sequence.encode("latin-1", "replace"), dtype=np.uint8)
+  return np.flatnonzero(~valid_lookup[codes])
+
+def validate_sequences(filename, valid_chars):
+  """
+  Streams a fafsa file and tests each sequence for valid characters as it is read.
+  Valid sequences are recognized with one bytes.translate call; the offending positions are only looked for in
+  invalid ones.
+  Parameters:
+    filename: string - path-to-fafsa-file
+    valid_chars: list of valid chars in the sequence
+  Yields:
+    item : [name, header_line, sequence]
+    valid : True if the sequence is not empty and has only valid chars
+    invalid_positions : numpy array of the positions of the invalid chars (empty for valid and for empty sequences)
+  """
+  deletechars = "".join(valid_chars).encode("latin-1", "replace")
+  valid_lookup = build_valid_lookup(valid_chars)
+  no_positions = np.zeros(0, dtype=np.intp)
+  for item in iter_file(filename):
+    sequence = item[2]
+    if sequence and not sequence.encode("latin-1", "replace").translate(None, deletechars):
+      yield item, True, no_positions
+    else:
+      yield item, False, find_invalid_chars(sequence, valid_lookup)
 
 def get_valid_sequences(filename, valid_chars):
   """
@@ -82,9 +147,8 @@ def get_valid_sequences(filename, valid_chars):
   valid_sequences = []
   invalid_sequences = []
 
-  results = read_file(filename)
-  for item in results:
-    if contains_only_valid_chars(item[2], valid_chars):
+  for item, valid, _ in validate_sequences(filename, valid_chars):
+    if valid:
       valid_sequences.append(item)
     else:
       invalid_sequences.append(item)
@@ -104,3 +168,6 @@ if __name__ == "__main__":
   v, i = get_valid_sequences(filename, valid_chars)
   print(v)
   print(i)
+  for item, valid, invalid_positions in validate_sequences(filename, valid_chars):
+    if not valid:
+      print(item[0], "invalid chars:", len(invalid_positions), "first at:", invalid_positions[:10])
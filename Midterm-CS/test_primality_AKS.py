@@ -5,15 +5,29 @@
 
 import math
 
-def binpow(a,b):
+import numpy as np
+
+def binpow(a,b,m=None):
   """
   Computes a**b efficiently for a and b integers.
   Arguments:
     a : integer base
     b : integer power
+    m : integer modulus (optional); every product is reduced modulo m so the
+        numbers never grow beyond m**2
   Returns:
-    result : integer, a ** b.
+    result : integer, a ** b, or a ** b % m if m is given.
   """
+  if m is not None:
+    result = 1 % m
+    a %= m
+    while b > 0:
+      if b & 1:
+        result = result * a % m
+      a = a * a % m
+      b >>= 1
+    return result
+
   result = 1
   while b > 0:
     if b & 1: # if lowest bit is 1
@@ -39,7 +53,7 @@ def prime_factors(n):
     factors.append([2, count])
 
   m = 3
-  while m < n: # do all the odds: m increasing and n decreasing with each factor
+  while m*m <= n: # do all the odds up to sqrt(n): m increasing and n decreasing with each factor
     if n%m == 0:
       count = 0
       while n%m==0:
@@ -48,7 +62,7 @@ def prime_factors(n):
       factors.append([m, count])
     m += 2
 
-  if n!=1: # no factors found, i.e, n is itself prime
+  if n!=1: # no factors up to sqrt(n) left, i.e, what remains is prime
     factors.append([n,1])
   return factors
 
@@ -56,15 +70,146 @@ def prime_factors(n):
 def euler_totient(n):
   """
   Compute Euler's totient function using Euler theorem: phi(n) = n Product(p|n) (1-1/p)
+  Each factor is applied as n // p * (p-1), which is exact in integers.
   """
   ps = [x[0] for x in prime_factors(n)]
-  result = n*1.0
+  result = n
   for p in ps:
-    result *= (p-1)/p
-  return int(result)
+    result = result // p * (p-1)
+  return result
 
 
-############ More functions needed below
+def integer_root(n, k):
+  """
+  Computes the integer k-th root of n, the largest x with x**k <= n, by Newton's method in integers.
+  Arguments:
+    n : non-negative integer
+    k : positive integer
+  Returns:
+    x : integer
+  """
+  if n < 2:
+    return n
+  x = 1 << ((n.bit_length() + k - 1) // k) # 2**ceil(bits/k) >= root
+  while True:
+    y = ((k-1)*x + n // binpow(x, k-1)) // k
+    if y >= x:
+      return x
+    x = y
+
+
+def is_perfect_power(n):
+  """
+  Step 1 of AKS: checks whether n = a**b for integers a > 1 and b > 1.
+  """
+  for b in range(2, n.bit_length() + 1):
+    a = integer_root(n, b)
+    if a > 1 and binpow(a, b) == n:
+      return True
+  return False
+
+
+def smallest_r(n):
+  """
+  Step 2 of AKS: finds the smallest r such that the multiplicative order of n modulo r exceeds log2(n)**2.
+  Any r that shares a factor with n has no such order and is skipped; step 3 of AKS catches those factors.
+  """
+  max_k = int(math.log2(n)**2)
+  r = 2
+  while True:
+    if math.gcd(r, n) == 1:
+      x = 1
+      for k in range(1, max_k + 1):
+        x = x * n % r
+        if x == 1:
+          break
+      else: # n**k != 1 (mod r) for every k <= log2(n)**2
+        return r
+    r += 1
+
+
+def limb_bits(r, n):
+  """
+  Number of bits of the limbs that polynomial coefficients modulo n are split into, so that a convolution of r
+  limbs with r coefficients, plus a carried coefficient shifted by one limb, stays below 2**63:
+  (r+1) * 2**bits * n < 2**63.
+  """
+  return 63 - (r+1).bit_length() - n.bit_length()
+
+
+def poly_mulmod(p, q, r, n):
+  """
+  Multiplies two polynomials modulo (X**r - 1, n).
+  int64 coefficients are multiplied limb by limb (see limb_bits), from the most significant limb of p down,
+  reducing modulo n after each, so no product overflows; object coefficients are Python integers.
+  Arguments:
+    p, q : numpy arrays of r coefficients, lowest degree first, each in [0, n)
+    r, n : integers
+  Returns:
+    numpy array of r coefficients of p*q mod (X**r - 1, n)
+  """
+  if p.dtype == object:
+    c = np.convolve(p, q)
+  else:
+    bits = limb_bits(r, n)
+    c = np.zeros(2*r - 1, dtype=np.int64)
+    mask = (1 << bits) - 1
+    for shift in range((n.bit_length() - 1) // bits * bits, -1, -bits):
+      c = ((c << bits) + np.convolve((p >> shift) & mask, q)) % n
+  c[:r-1] += c[r:] # X**(r+i) = X**i modulo X**r - 1
+  return c[:r] % n
+
+
+def poly_powmod(a, n, r):
+  """
+  Computes (X + a)**n modulo (X**r - 1, n) by square-and-multiply, as in binpow.
+  The coefficients are int64 while limbs of at least 8 bits fit, Python integers otherwise.
+  Returns:
+    numpy array of r coefficients, lowest degree first
+  """
+  dtype = np.int64 if limb_bits(r, n) >= 8 else object
+  base = np.zeros(r, dtype=dtype)
+  base[0] = a % n
+  base[1 % r] += 1
+  result = np.zeros(r, dtype=dtype)
+  result[0] = 1
+  b = n
+  while b > 0:
+    if b & 1:
+      result = poly_mulmod(result, base, r, n)
+    base = poly_mulmod(base, base, r, n)
+    b >>= 1
+  return result
+
+
+def aks_is_prime(n):
+  """
+  Agrawal-Kayal-Saxena deterministic polynomial time primality test.
+  Arguments:
+    n : integer
+  Returns:
+    bool, whether n is prime
+  """
+  if n < 2:
+    return False
+  if is_perfect_power(n): # step 1
+    return False
+  r = smallest_r(n) # step 2
+  for a in range(2, min(r, n-1) + 1): # step 3
+    if 1 < math.gcd(a, n) < n:
+      return False
+  if n <= r: # step 4
+    return True
+  # step 5: (X+a)**n = X**n + a (mod X**r - 1, n) for a = 1 .. floor(sqrt(phi(r)) log2(n))
+  limit = int(math.sqrt(euler_totient(r)) * math.log2(n))
+  for a in range(1, limit + 1):
+    expected = np.zeros(r, dtype=np.int64)
+    expected[n % r] = 1
+    expected[0] = (expected[0] + a) % n
+    if not np.array_equal(poly_powmod(a, n, r), expected):
+      return False
+  return True
+
 
 if __name__ == "__main__":
   # a = 3
@@ -78,4 +223,7 @@ if __name__ == "__main__":
   # print( prime_factors(n) )
   nn = [2, 3, 4, 5, 6, 7, 8, 9, 10, 23456780]
   for n in nn:
-    print("phi({}) = {}".format(n, euler_totient(n)) )
\ No newline at end of file
+    print("phi({}) = {}".format(n, euler_totient(n)) )
+
+  for n in [31, 561, 7919, 1000003, 1000001]:
+    print("{} is prime: {}".format(n, aks_is_prime(n)))
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Parameter sweep of the haploid selection model.
+
+Runs wright_fisher for every combination of the given values of N, f1, w1, w2 and gens, spreading the runs over a
+pool of worker processes.  Every run gets its own random stream, spawned from one root SeedSequence in grid order, so
+a sweep gives the same results for the same seed whatever the number of workers: run i uses
+SeedSequence(seed, spawn_key=(i,)), seed being the root entropy written in the seed column.  One summary line per run
+is written, in grid order, as soon as the run is done:
+  fixation_probability : fraction of replicates in which allele 1 reached frequency 1
+  mean_fixation_time : mean generation at which it did, over those replicates (nan if none)
+  extinction_probability : fraction of replicates in which the whole population died out
+  mean_final_freq1 : mean frequency of allele 1 in the last generation, over the surviving replicates (nan if none)
+Given a trajectory directory, the full trajectories of run i are also kept there as run_<i>.traj (see trajectory_store).
+
+Usage (from the natural-selection-haploid directory):
+  python parameter_sweep.py --N 100 1000 --f1 0.1 0.5 --w1 1.0 1.05 --w2 1.0 --gens 200 --replicates 1000 --seed 1 \
+    --output sweep.tsv
+"""
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+import argparse
+import itertools
+import json
+import os
+import sys
+
+import numpy as np
+
+from wright_fisher import wright_fisher, allele_frequencies
+from trajectory_store import create_trajectories
+
+PARAMETERS = ["N", "f1", "w1", "w2", "gens"]
+SUMMARY_COLUMNS = ["fixation_probability", "mean_fixation_time", "extinction_probability", "mean_final_freq1"]
+TSV_COLUMNS = ["run"] + PARAMETERS + ["replicates", "seed"] + SUMMARY_COLUMNS
+
+
+def parameter_grid(N, f1, w1, w2, gens):
+  """
+  Args:
+    N, f1, w1, w2, gens = lists of values of each parameter
+  Returns:
+    grid: list of dict, one per combination of values, the last parameter varying fastest
+  """
+  return [dict(zip(PARAMETERS, values)) for values in itertools.product(N, f1, w1, w2, gens)]
+
+
+def summarize(populations):
+  """
+  Args:
+    populations = int array (replicates x gens+1 x 2), as returned by wright_fisher
+  Returns:
+    summary: dict with the SUMMARY_COLUMNS of the run
+  """
+  fixed = (populations[:, :, 1] == 0) & (populations[:, :, 0] > 0)
+  ever_fixed = fixed.any(axis=1)
+  final = populations[:, -1]
+  alive = final.sum(axis=1) > 0
+  return {
+    "fixation_probability": float(ever_fixed.mean()),
+    "mean_fixation_time": float(fixed.argmax(axis=1)[ever_fixed].mean()) if ever_fixed.any() else float("nan"),
+    "extinction_probability": float((~alive).mean()),
+    "mean_final_freq1": float(allele_frequencies(final)[alive, 0].mean()) if alive.any() else float("nan"),
+  }
+
+
+def trajectory_file(trajectory_dir, run):
+  return os.path.join(trajectory_dir, "run_{:05d}.traj".format(run))
+
+
+def run_one(run, params, replicates, seed_sequence, trajectory_dir=None):
+  """
+  Simulates and summarizes one point of the grid.  Runs in a worker process.
+  Args:
+    run = index of the point in the grid
+    params = dict of N, f1, w1, w2, gens
+    replicates = number of replicates
+    seed_sequence = numpy.random.SeedSequence of this run
+    trajectory_dir = directory to keep the trajectories in, or None
+  Returns:
+    row: dict with the TSV_COLUMNS of the run
+  """
+  out = None
+  if trajectory_dir:
+    out = create_trajectories(trajectory_file(trajectory_dir, run), (replicates, params["gens"] + 1, 2), params,
+                              seed_sequence)
+  populations = wright_fisher(params["N"], [params["f1"], 1 - params["f1"]], [params["w1"], params["w2"]],
+                              params["gens"], replicates, seed_sequence, out=out)
+  row = {"run": run}
+  row.update(params)
+  row["replicates"] = replicates
+  row["seed"] = seed_sequence.entropy
+  row.update(summarize(populations))
+  if isinstance(populations, np.memmap):
+    populations.flush()
+  return row
+
+
+def write_tsv_row(outfile, row):
+  outfile.write("\t".join(str(row[column]) for column in TSV_COLUMNS) + "\n")
+
+
+def write_jsonl_row(outfile, row):
+  outfile.write(json.dumps(row) + "\n")
+
+
+def sweep(grid, outfile, replicates=1000, seed=None, workers=None, output_format="tsv", trajectory_dir=None):
+  """
+  Simulates every point of the grid and writes its summary.
+  Args:
+    grid = list of dict of N, f1, w1, w2, gens, e.g. from parameter_grid
+    outfile = open text file for the summaries
+    replicates = number of replicates per point
+    seed = root seed; None draws a fresh one, which is written in the seed column
+    workers = number of worker processes; 1 runs everything in this process
+    output_format = "tsv" or "jsonl"
+    trajectory_dir = directory to keep the trajectories of every run in, or None to keep only the summaries
+  Returns:
+    count: number of runs written
+  """
+  write_row = write_tsv_row if output_format == "tsv" else write_jsonl_row
+  if output_format == "tsv":
+    outfile.write("\t".join(TSV_COLUMNS) + "\n")
+
+  if trajectory_dir:
+    os.makedirs(trajectory_dir, exist_ok=True)
+  seed_sequences = np.random.SeedSequence(seed).spawn(len(grid))
+  count = 0
+  if workers == 1:
+    for run, (params, seed_sequence) in enumerate(zip(grid, seed_sequences)):
+      write_row(outfile, run_one(run, params, replicates, seed_sequence, trajectory_dir))
+      count += 1
+    return count
+
+  workers = workers or os.cpu_count() or 1
+  with ProcessPoolExecutor(max_workers=workers) as executor:
+    # Keep a bounded number of runs in flight and write them back in grid order
+    max_pending = 2 * workers
+    pending = deque()
+    for run, (params, seed_sequence) in enumerate(zip(grid, seed_sequences)):
+      pending.append(executor.submit(run_one, run, params, replicates, seed_sequence, trajectory_dir))
+      if len(pending) >= max_pending:
+        write_row(outfile, pending.popleft().result())
+        count += 1
+    while pending:
+      write_row(outfile, pending.popleft().result())
+      count += 1
+  return count
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Sweep the haploid selection model over a grid of parameters.")
+  parser.add_argument("--N", type=int, nargs="+", default=[1000], help="initial population sizes")
+  parser.add_argument("--f1", type=float, nargs="+", default=[0.5], help="initial frequencies of allele 1")
+  parser.add_argument("--w1", type=float, nargs="+", default=[1.0], help="fitnesses of allele 1")
+  parser.add_argument("--w2", type=float, nargs="+", default=[1.0], help="fitnesses of allele 2")
+  parser.add_argument("--gens", type=int, nargs="+", default=[50], help="numbers of generations")
+  parser.add_argument("-r", "--replicates", type=int, default=1000, help="replicates per run (default: 1000)")
+  parser.add_argument("-s", "--seed", type=int, default=None, help="root seed (default: fresh entropy)")
+  parser.add_argument("-o", "--output", help="output file (default: standard output)")
+  parser.add_argument("-f", "--format", choices=["tsv", "jsonl"], default="tsv", help="output format (default: tsv)")
+  parser.add_argument("-w", "--workers", type=int, default=None,
+                      help="number of worker processes (default: number of CPUs)")
+  parser.add_argument("-t", "--trajectories", metavar="DIR", help="also keep the trajectories of every run in DIR")
+  args = parser.parse_args()
+
+  grid = parameter_grid(args.N, args.f1, args.w1, args.w2, args.gens)
+  if args.output:
+    with open(args.output, "w") as outfile:
+      count = sweep(grid, outfile, args.replicates, args.seed, args.workers, args.format, args.trajectories)
+  else:
+    count = sweep(grid, sys.stdout, args.replicates, args.seed, args.workers, args.format, args.trajectories)
+  print("{} runs done".format(count), file=sys.stderr)
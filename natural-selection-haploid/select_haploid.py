@@ -16,13 +16,30 @@ Output:
 A good reference:
 https://www.nature.com/scitable/knowledge/library/natural-selection-genetic-drift-and-gene-flow-15186648/
 """
+import os
+import numbers
 import numpy as np  # we will use np.random.poisson() to sample from Poisson
 import matplotlib.pyplot as plt 
 
 from tqdm import tqdm # for progress monitoring
 from random_colormap import rand_cmap
+from wright_fisher import wright_fisher
+from trajectory_store import create_trajectories, write_trajectories
 
-def select_haploid(N, f1, w1, w2, gens=1, output_file=None):
+def seed_sequence(seed):
+  """
+  Args:
+    seed = None, an integer (numpy integers included) or a numpy.random.SeedSequence
+  Returns:
+    seed as a SeedSequence, whose entropy can be recorded even when seed is None
+  """
+  if isinstance(seed, np.random.SeedSequence):
+    return seed
+  if isinstance(seed, numbers.Integral):
+    seed = int(seed)
+  return np.random.SeedSequence(seed)
+
+def select_haploid(N, f1, w1, w2, gens=1, output_file=None, seed=None):
   """
   Simulates the natural selection process in a haploid.
   Args:
@@ -31,7 +48,9 @@ def select_haploid(N, f1, w1, w2, gens=1, output_file=None):
     w1 = relative fitness of allele 1
     w2 = relative fitness of allele 2
     gens = number of generations to simulate
-    oputput_file = name of the outfile if saving the output desired
+    oputput_file = name of the outfile if saving the output desired; a name ending in .traj is written in the
+                   binary format of trajectory_store, any other as text
+    seed = seed or SeedSequence of the random numbers; recorded in a .traj file (its entropy if None)
   Returns:
     populations: List of [allele 1 population, allele 2 population] for each generation
 
@@ -40,15 +59,21 @@ def select_haploid(N, f1, w1, w2, gens=1, output_file=None):
   N1 = int(N*f1)
   N2 = N-N1
   populations = [[N1,N2]]
+  seed = seed_sequence(seed)
+  rng = np.random.default_rng(seed)
 
   for _ in tqdm(range(gens)): # run using a progress bar
-    # generate populations for the two allele by Poisson sampling
-    N1 = np.sum(np.random.poisson(lam=w1, size=N1 ))
-    N2 = np.sum(np.random.poisson(lam=w2, size=N2 ))
+    # generate populations for the two allele by Poisson sampling;
+    # the sum of N1 Poisson(w1) draws is one Poisson(w1*N1) draw
+    N1 = rng.poisson(lam=w1*N1)
+    N2 = rng.poisson(lam=w2*N2)
     # Record the data
     populations.append([N1, N2])
 
-  if output_file:
+  if output_file and output_file.endswith(".traj"):
+    parameters = {"N": N, "f1": f1, "w1": w1, "w2": w2, "gens": gens}
+    write_trajectories(output_file, np.array([populations], dtype=np.int64), parameters, seed)
+  elif output_file:
     with open(output_file, "w") as filehandle:
       for pops in populations:
         filehandle.write('%s\n' % pops)
@@ -57,13 +82,16 @@ def select_haploid(N, f1, w1, w2, gens=1, output_file=None):
 
 def simulate(initial_values, num_simulations=2):
   """
-  Simulates haploid simple selection for num_simulations times.
+  Simulates haploid simple selection for num_simulations times. All simulations advance together (see wright_fisher).
   Args:
     initial_values: dictionary with keys:
       output_file, savefig_file, generations, initial_population, initial_freq1, fitness_1, fitness2
+      and optionally seed
+    An output_file ending in .traj is written in the binary format of trajectory_store, any other as text.
   Returns:
     result:
-      List of list(simulation number) of list([N1, N2] for each generation)
+      List of list(simulation number) of list([N1, N2] for each generation); for a .traj output_file, the
+      memory-mapped (simulations x generations x 2) array of the file instead
   
   """
   output_file=initial_values["output_file"]
@@ -73,12 +101,24 @@ def simulate(initial_values, num_simulations=2):
   f1=initial_values["initial_freq1"]
   w1=initial_values["fitness1"]
   w2=initial_values["fitness2"]
+
+  # one SeedSequence seeds the simulation and goes in the header of a .traj file, so that a run without a seed
+  # can be repeated from the entropy recorded there
+  seed = initial_values.get("seed")
+  if not isinstance(seed, np.random.Generator): # a Generator is only accepted without a .traj file
+    seed = seed_sequence(seed)
   scriptdir = os.path.dirname(os.path.realpath(__file__))
 
-  result = []
-  for sim in tqdm(range(num_simulations)):
-    populations = select_haploid(N, f1, w1, w2, gens, None) # don't write yet
-    result.append(populations)
+  if output_file and output_file.endswith(".traj"):
+    # the simulation fills the mapped file directly
+    parameters = {"N": N, "f1": f1, "w1": w1, "w2": w2, "gens": gens}
+    out = create_trajectories(scriptdir+"/"+output_file, (num_simulations, gens+1, 2), parameters, seed)
+    result = wright_fisher(N, [f1, 1-f1], [w1, w2], gens, num_simulations, seed, out=out)
+    if isinstance(result, np.memmap): # no file is mapped for an empty simulation
+      result.flush()
+    return result
+
+  result = wright_fisher(N, [f1, 1-f1], [w1, w2], gens, num_simulations, seed).tolist()
   if output_file:
     output_file = scriptdir+"/"+output_file
     with open(output_file, "w") as filehandle:
@@ -88,12 +128,10 @@ def simulate(initial_values, num_simulations=2):
 
 
 if __name__ == "__main__":
-  import os
-  
   # Give parameters for simulation and saving data to file
   num_simulations = 5
 
-  output_file="data.txt" # if not saving, then make it None
+  output_file="data.traj" # if not saving, then make it None; use a .txt name for text
   savefig_file="natural_selection_haploid.png"
   gens = 50
   N=1000
@@ -109,8 +147,7 @@ if __name__ == "__main__":
     "fitness2" : w2,
   }
 
-  result = simulate(initial_values, num_simulations)
-  #print(result)
+  results = simulate(initial_values, num_simulations)
 
   # # simulate
   scriptdir = os.path.dirname(os.path.realpath(__file__))
@@ -125,8 +162,9 @@ if __name__ == "__main__":
       '''Returns a function that maps each index in 0, 1, ..., n-1 to a distinct 
       RGB color; the keyword argument name must be a standard mpl colormap name.'''
       return plt.cm.get_cmap(name, n)
-  cmap = rand_cmap(len(result), type='bright', verbose=False)
-  for sim_num, populations in enumerate(result):
+  cmap = rand_cmap(num_simulations, type='bright', verbose=False)
+  for sim_num in range(num_simulations):
+    populations = results[sim_num] # of a .traj file, only this simulation is read
     # gather data to plot
     generations = range( len(populations) )
     population1 = [pf[0] for pf in populations]
@@ -0,0 +1,142 @@
+"""
+Binary storage of population trajectories.
+
+A .traj file holds one int64 array of shape (replicates x gens+1 x alleles), as returned by wright_fisher, in a single
+memory-mappable file:
+  MAGIC (8 bytes)
+  length of the header (little-endian uint64)
+  header: JSON with the shape, the dtype, the simulation parameters and the seed, padded with spaces so that the data
+          starts at a multiple of ALIGNMENT bytes
+  data: the array in C order, so every replicate is one contiguous block
+
+One replicate is read with a single seek and read; a slice of generations is read through a memory map without
+touching the other generations' pages more than the layout requires.
+"""
+import json
+import numbers
+import struct
+
+import numpy as np
+
+MAGIC = b"\x93HAPTRAJ"
+ALIGNMENT = 64
+DTYPE = np.dtype("<i8")
+
+
+def seed_metadata(seed):
+  """
+  Args:
+    seed = seed passed to wright_fisher: None, an integer (numpy integers included) or a numpy.random.SeedSequence
+  Returns:
+    JSON-serializable description of the seed
+  Raises:
+    TypeError: for a numpy.random.Generator, whose state cannot be recorded; pass its seed instead
+  """
+  if isinstance(seed, np.random.SeedSequence):
+    return {"entropy": seed.entropy, "spawn_key": list(seed.spawn_key)}
+  if isinstance(seed, numbers.Integral):
+    return int(seed)
+  if isinstance(seed, np.random.Generator):
+    raise TypeError("the seed of a Generator cannot be recorded; pass an integer or a SeedSequence")
+  return seed
+
+
+def read_header(filename):
+  """
+  Args:
+    filename = path of a .traj file
+  Returns:
+    header: dict with shape, dtype, parameters and seed
+    offset: position of the data in the file
+  Raises:
+    ValueError: if the file is not a trajectory file
+  """
+  with open(filename, "rb") as infile:
+    if infile.read(len(MAGIC)) != MAGIC:
+      raise ValueError("{} is not a trajectory file".format(filename))
+    header_length, = struct.unpack("<Q", infile.read(8))
+    header = json.loads(infile.read(header_length).decode("utf-8"))
+  header["shape"] = tuple(header["shape"])
+  return header, len(MAGIC) + 8 + header_length
+
+
+def create_trajectories(filename, shape, parameters=None, seed=None):
+  """
+  Creates a trajectory file and maps its data for writing, e.g. as the out argument of wright_fisher.
+  Args:
+    filename = path of the .traj file
+    shape = (replicates, gens+1, alleles)
+    parameters = dict of simulation parameters to keep in the header
+    seed = seed of the simulation, see seed_metadata
+  Returns:
+    populations: writable numpy memmap of the given shape
+  """
+  header = json.dumps({
+    "shape": list(shape),
+    "dtype": DTYPE.str,
+    "parameters": parameters or {},
+    "seed": seed_metadata(seed),
+  }).encode("utf-8")
+  start = len(MAGIC) + 8 + len(header)
+  header += b" " * (-start % ALIGNMENT)
+  with open(filename, "wb") as outfile:
+    outfile.write(MAGIC)
+    outfile.write(struct.pack("<Q", len(header)))
+    outfile.write(header)
+  offset = len(MAGIC) + 8 + len(header)
+  if int(np.prod(shape)) == 0:
+    return np.zeros(shape, dtype=DTYPE)
+  return np.memmap(filename, dtype=DTYPE, mode="r+", offset=offset, shape=tuple(shape))
+
+
+def write_trajectories(filename, populations, parameters=None, seed=None):
+  """
+  Writes an array of trajectories (replicates x gens+1 x alleles) to a trajectory file.
+  """
+  out = create_trajectories(filename, populations.shape, parameters, seed)
+  out[...] = populations
+  if isinstance(out, np.memmap):
+    out.flush()
+
+
+def open_trajectories(filename):
+  """
+  Maps a trajectory file read-only; nothing is read until the array is indexed.
+  Returns:
+    populations: numpy memmap (replicates x gens+1 x alleles)
+    header: dict with shape, dtype, parameters and seed
+  """
+  header, offset = read_header(filename)
+  if int(np.prod(header["shape"])) == 0:
+    return np.zeros(header["shape"], dtype=header["dtype"]), header
+  populations = np.memmap(filename, dtype=header["dtype"], mode="r", offset=offset, shape=header["shape"])
+  return populations, header
+
+
+def read_replicate(filename, replicate):
+  """
+  Reads the trajectory of one replicate.
+  Returns:
+    populations: int64 array (gens+1 x alleles)
+  """
+  header, offset = read_header(filename)
+  replicates, generations, alleles = header["shape"]
+  if not 0 <= replicate < replicates:
+    raise IndexError("replicate {} out of range 0..{}".format(replicate, replicates - 1))
+  dtype = np.dtype(header["dtype"])
+  count = generations * alleles
+  with open(filename, "rb") as infile:
+    infile.seek(offset + replicate * count * dtype.itemsize)
+    return np.fromfile(infile, dtype=dtype, count=count).reshape(generations, alleles)
+
+
+def read_generations(filename, start, stop=None):
+  """
+  Reads generations start..stop-1 of every replicate.
+  Returns:
+    populations: int64 array (replicates x stop-start x alleles)
+  """
+  populations, _ = open_trajectories(filename)
+  if stop is None:
+    stop = start + 1
+  return np.array(populations[:, start:stop])
@@ -0,0 +1,66 @@
+"""
+Vectorized simulator of the haploid selection model of select_haploid.
+
+Each generation every individual carrying allele i leaves a Poisson(w_i) number of offspring.  The sum of N_i such
+draws is one Poisson(w_i * N_i) draw, so a generation costs one draw per allele and replicate, whatever the population
+size, and all replicates advance together as NumPy arrays.  Populations of 10**9 and more are fine as long as the
+counts stay below the int64 range of numpy's Poisson sampler (about 9 * 10**18).
+"""
+import numpy as np
+
+
+def initial_counts(N, frequencies):
+  """
+  Splits a population of N among the alleles as select_haploid does: int(N*f) individuals for every allele but the
+  last, which gets the rest.
+  Args:
+    N = initial population size
+    frequencies = initial allele frequencies
+  Returns:
+    counts: int64 array, one count per allele
+  """
+  counts = np.array([int(N*f) for f in frequencies[:-1]] + [0], dtype=np.int64)
+  counts[-1] = N - counts[:-1].sum()
+  return counts
+
+
+def wright_fisher(N, frequencies, fitnesses, gens=1, replicates=1, seed=None, out=None):
+  """
+  Simulates the natural selection process in a haploid for many replicates at once.
+  Args:
+    N = initial population size
+    frequencies = initial frequency of each allele, e.g. [f1, 1-f1]
+    fitnesses = relative fitness of each allele, e.g. [w1, w2]
+    gens = number of generations to simulate
+    replicates = number of independent replicates
+    seed = seed, SeedSequence or numpy.random.Generator of the random numbers
+    out = optional preallocated int64 array of shape (replicates, gens+1, alleles) to fill, e.g. a memory map
+  Returns:
+    populations: int64 array (replicates x gens+1 x alleles), populations[r, g, i] is the number of individuals with
+                 allele i in generation g of replicate r
+  """
+  rng = np.random.default_rng(seed)
+  fitnesses = np.asarray(fitnesses, dtype=float)
+  shape = (replicates, gens + 1, len(fitnesses))
+  if out is None:
+    populations = np.empty(shape, dtype=np.int64)
+  else:
+    if out.shape != shape:
+      raise ValueError("out has shape {}, expected {}".format(out.shape, shape))
+    populations = out
+
+  populations[:, 0] = initial_counts(N, frequencies)
+  for g in range(gens):
+    populations[:, g + 1] = rng.poisson(populations[:, g] * fitnesses)
+  return populations
+
+
+def allele_frequencies(populations):
+  """
+  Args:
+    populations = array (... x alleles) of allele counts, as returned by wright_fisher
+  Returns:
+    frequencies: float array of the same shape; 0 where the population is extinct
+  """
+  totals = populations.sum(axis=-1, keepdims=True)
+  return np.divide(populations, totals, out=np.zeros(populations.shape), where=totals != 0)
@@ -0,0 +1,121 @@
+#####Backtracking solution of the partial digest problem#####
+# Skiena's algorithm with backtracking: the largest remaining fragment y
+# must be the distance from one of the two ends, so the next cleavage site
+# is either y or dna_length - y. Each choice is kept only if all of its
+# distances to the sites placed so far are among the remaining fragments;
+# otherwise, or once the branch is done, the other choice is tried.
+# Unlike skiena_partial_digest.partial_digest this never gives up on an
+# inconsistency, and it can enumerate every homometric solution (distinct
+# maps with the same partial digest).
+# Fragments are kept in a Counter, so placing a site and undoing it cost
+# O(number of sites); the largest remaining fragment is found with a
+# pointer that only moves down the sorted distinct sizes.
+################################################################################
+
+import collections
+
+from skiena_partial_digest import take_distances, put_back, pairwise_distances
+
+def is_triangular(n):
+    """
+    Whether n = k(k-1)/2 for some k, as the number of fragments of a partial digest must be.
+    """
+    k = int(((8*n + 1) ** 0.5 + 1) / 2)
+    return any(m*(m-1)//2 == n for m in (k-1, k, k+1))
+
+def place(counts, sizes, start, sites, dna_length, first):
+    """
+    Places the remaining cleavage sites, yielding every completed map.
+    Arguments:
+        counts : collections.Counter of the remaining fragments
+        sizes : distinct fragment sizes, largest first
+        start : index into sizes where the largest remaining fragment is searched from
+        sites : list of the cleavage sites placed so far
+        dna_length : integer, the largest fragment
+        first : only try the site measured from the origin; used at the top to skip mirror images
+    Yields:
+        sorted list of cleavage sites
+    """
+    while start < len(sizes) and counts[sizes[start]] == 0:
+        start += 1
+    if start == len(sizes):
+        yield sorted(sites)
+        return
+    y = sizes[start]
+    choices = [y] if first or y == dna_length - y else [y, dna_length - y]
+    for x in choices:
+        removed = take_distances(x, sites, counts)
+        if removed is None: # pruned: some distance of x is not a fragment
+            continue
+        sites.append(x)
+        yield from place(counts, sizes, start, sites, dna_length, False)
+        sites.pop()
+        put_back(removed, counts)
+
+def partial_digest_solutions(fragments):
+    """
+    Yields the maps consistent with a partial digest, one per pair of mirror images.
+    Arguments:
+        fragments : list of fragment sizes (not modified)
+    Yields:
+        sorted list of cleavage sites, starting at 0
+    """
+    if not fragments or not is_triangular(len(fragments)):
+        return
+    counts = collections.Counter(fragments)
+    dna_length = max(fragments)
+    counts[dna_length] -= 1
+    sizes = sorted(counts, reverse=True)
+    # Every map has a mirror image, x -> dna_length - x. Placing the first
+    # site from the origin finds one of each pair; a map found twice is
+    # its own mirror's twin, so duplicates are skipped.
+    seen = set()
+    for sites in place(counts, sizes, 0, [0, dna_length], dna_length, True):
+        mirror = sorted(dna_length - x for x in sites)
+        key = tuple(min(sites, mirror))
+        if key not in seen:
+            seen.add(key)
+            yield sites
+
+def backtracking_partial_digest(fragments):
+    """
+    The main function. Given fragments, finds cleavage sites consistent with all of them.
+    Returns:
+        sorted list of cleavage sites, or None if no map fits the fragments
+    """
+    return next(partial_digest_solutions(fragments), None)
+
+def homometric_solutions(fragments, max_solutions=None):
+    """
+    Returns every map consistent with the fragments, up to mirror images.
+    Arguments:
+        fragments : list of fragment sizes
+        max_solutions : stop after this many maps (default: find all)
+    """
+    solutions = []
+    for sites in partial_digest_solutions(fragments):
+        solutions.append(sites)
+        if max_solutions is not None and len(solutions) >= max_solutions:
+            break
+    return solutions
+
+def test_backtracking_partial_digest():
+    fragments = [2, 2, 3, 3, 4, 5, 6, 7, 8, 10]
+    cleavage_sites = backtracking_partial_digest(fragments)
+    print("cleavage_sites: ", cleavage_sites)
+    print("consistent: ", pairwise_distances(cleavage_sites) == sorted(fragments))
+
+def test_homometric_solutions():
+    # {0,1,4,10,12,17} and {0,1,8,11,13,17} have the same partial digest
+    fragments = pairwise_distances([0, 1, 4, 10, 12, 17])
+    for cleavage_sites in homometric_solutions(fragments):
+        print("cleavage_sites: ", cleavage_sites)
+
+def test_inconsistent_fragments():
+    fragments = [1, 2, 3, 4, 5, 100]
+    print("cleavage_sites: ", backtracking_partial_digest(fragments)) # None
+
+if __name__ == "__main__":
+    test_backtracking_partial_digest()
+    test_homometric_solutions()
+    test_inconsistent_fragments()
@@ -0,0 +1,149 @@
+#####Double digest by a search over fragment orderings#####
+# A double digest cuts the same DNA with enzyme A, with enzyme B and with
+# both: three multisets of fragment sizes, the A+B fragments being the
+# pieces between neighbouring sites of either enzyme. A map is an ordering
+# of the A fragments and one of the B fragments; checking every pair of
+# permutations is hopeless beyond about 10 fragments.
+# Here the orderings are built from the origin, always extending the enzyme
+# whose last site is nearer the origin. No site can fall before the nearer
+# of the two last sites that is not known already, so placing a fragment
+# fixes the next A+B fragment: from the nearer last site to the nearer of
+# the new site and the other enzyme's last site. It must still be among the
+# A+B fragments (a Counter, taken and put back as in skiena_partial_digest),
+# or the ordering is dropped together with every ordering starting with it.
+# Equal fragments are tried once.
+# The orderings starting with different first A and B fragments are
+# independent, so they are searched in parallel over a process pool.
+################################################################################
+
+import collections
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from skiena_partial_digest import take_distances, put_back, adjacent_distances
+
+def extend(counts, ab_counts, orders, ends, dna_length):
+    """
+    Extends the A and B orderings in every way consistent with the A+B fragments, yielding every completed map.
+    Arguments:
+        counts : [A, B] collections.Counter of the fragments not placed yet
+        ab_counts : collections.Counter of the A+B fragments not explained yet
+        orders : [A, B] lists of the fragments placed so far, from the origin
+        ends : [A, B] positions of the last site placed
+        dna_length : length of the DNA, the sum of the fragments of each digest
+    Yields:
+        (A ordering, B ordering), copies
+    """
+    if ends[0] == dna_length and ends[1] == dna_length:
+        yield list(orders[0]), list(orders[1])
+        return
+    e = 0 if ends[0] <= ends[1] else 1 # the enzyme behind
+    start = ends[e]
+    for size in sorted(counts[e]):
+        if counts[e][size] == 0:
+            continue
+        end = start + size
+        if end > dna_length:
+            break
+        # the next A+B fragment ends at the new site or at the other enzyme's last site, if nearer
+        nearer = min(end, ends[1 - e])
+        removed = take_distances(nearer, [start], ab_counts) if nearer > start else []
+        if removed is None: # pruned: that A+B fragment is not in the digest
+            continue
+        counts[e][size] -= 1
+        orders[e].append(size)
+        ends[e] = end
+        yield from extend(counts, ab_counts, orders, ends, dna_length)
+        ends[e] = start
+        orders[e].pop()
+        counts[e][size] += 1
+        put_back(removed, ab_counts)
+
+def solve_branch(branch):
+    """
+    The maps whose A and B orderings start with the given fragments; run in a worker process.
+    Arguments:
+        branch : (A fragments, B fragments, A+B fragments, first A fragment, first B fragment)
+    Returns:
+        list of (A ordering, B ordering)
+    """
+    a_fragments, b_fragments, ab_fragments, a_first, b_first = branch
+    counts = [collections.Counter(a_fragments), collections.Counter(b_fragments)]
+    ab_counts = collections.Counter(ab_fragments)
+    if take_distances(min(a_first, b_first), [0], ab_counts) is None:
+        return []
+    counts[0][a_first] -= 1
+    counts[1][b_first] -= 1
+    return list(extend(counts, ab_counts, [[a_first], [b_first]], [a_first, b_first], sum(a_fragments)))
+
+def cut_sites(order):
+    """
+    The sites of an ordering of fragments, both ends included.
+    """
+    sites = [0]
+    for size in order:
+        sites.append(sites[-1] + size)
+    return sites
+
+def double_digest(a_fragments, b_fragments, ab_fragments, workers=None):
+    """
+    The main function. Finds every map consistent with a double digest, one per pair of mirror images.
+    Arguments:
+        a_fragments : list of fragment sizes cut by enzyme A
+        b_fragments : list of fragment sizes cut by enzyme B
+        ab_fragments : list of fragment sizes cut by both
+        workers : number of worker processes; 1 searches in this process
+    Returns:
+        list of (A sites, B sites), each a list of sites from 0 to the DNA length
+    """
+    dna_length = sum(a_fragments)
+    if not a_fragments or sum(b_fragments) != dna_length or sum(ab_fragments) != dna_length:
+        return []
+    branches = [(a_fragments, b_fragments, ab_fragments, a_first, b_first)
+                for a_first in sorted(set(a_fragments)) for b_first in sorted(set(b_fragments))]
+    if workers == 1:
+        results = [solve_branch(branch) for branch in branches]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(solve_branch, branches))
+    # every map is found again read from the far end
+    seen = set()
+    solutions = []
+    for orders in results:
+        for a_order, b_order in orders:
+            key = min((tuple(a_order), tuple(b_order)), (tuple(reversed(a_order)), tuple(reversed(b_order))))
+            if key not in seen:
+                seen.add(key)
+                solutions.append((cut_sites(a_order), cut_sites(b_order)))
+    return solutions
+
+def double_digest_of(a_sites, b_sites):
+    """
+    The three digests of a map given by the sites of A and B, both ends included in each.
+    """
+    return adjacent_distances(a_sites), adjacent_distances(b_sites), adjacent_distances(set(a_sites) | set(b_sites))
+
+def test_double_digest():
+    a_fragments, b_fragments, ab_fragments = double_digest_of([0, 2, 6, 13, 16, 20], [0, 5, 6, 11, 20])
+    print("A, B, A+B: ", a_fragments, b_fragments, ab_fragments)
+    for a_sites, b_sites in double_digest(a_fragments, b_fragments, ab_fragments, workers=1):
+        print("A sites: ", a_sites, " B sites: ", b_sites)
+
+def test_random_double_digest():
+    # 12 A and 12 B fragments: 12!**2 pairs of orderings
+    rng = random.Random(1)
+    dna_length = 30000
+    a_sites = [0, dna_length] + rng.sample(range(1, dna_length), 11)
+    b_sites = [0, dna_length] + rng.sample(range(1, dna_length), 11)
+    a_fragments, b_fragments, ab_fragments = double_digest_of(a_sites, b_sites)
+    start = time.time()
+    solutions = double_digest(a_fragments, b_fragments, ab_fragments)
+    print("maps: ", len(solutions), " seconds: ", round(time.time() - start, 2))
+    print("found: ", any(a == sorted(a_sites) and b == sorted(b_sites) or
+                         a == sorted(dna_length - x for x in a_sites) and b == sorted(dna_length - x for x in b_sites)
+                         for a, b in solutions))
+
+if __name__ == "__main__":
+    test_double_digest()
+    test_random_double_digest()
@@ -0,0 +1,595 @@
+#####Partial digest with measurement error, missing and extra bands#####
+# Gel electrophoresis gives fragment sizes only up to some error, some
+# fragments are not seen (co-migrating or faint bands) and some bands are
+# not fragments of the DNA at all. A measured fragment m is taken as the
+# distance d between two sites when |m - d| <= tolerance +
+# relative_tolerance * d.
+# Sites are placed one at a time as in backtracking_partial_digest: the
+# next site is at the largest unexplained fragment from an end it is
+# further from (the first one from the origin, skipping mirror images), or
+# from an inner site while distances may be missing. With errors the
+# longest distance left may not be measured as the largest fragment, so
+# every fragment that could be it is tried. A long fragment puts the site
+# only roughly; it is then put at each fragment (found by binary search in
+# the sorted sizes) from the placed site whose distance gives its position
+# most precisely, and its other distances are matched to different
+# fragments at the least cost. Matching sorted distances to sorted
+# fragments is best for any convex cost, so this is dynamic programming
+# over the two sorted lists.
+# The sites are fitted to their fragments by weighted least squares, the
+# origin fixed at 0 and every fragment weighted by its allowed error, which
+# also tells how far off each fitted distance can be; fragments are looked
+# for that much further. A map is dropped when a fragment is further from
+# its fitted distance than the allowed error plus that uncertainty. The
+# maps kept have all their distances matched again and refitted, as a
+# fragment taken while the sites were rough may be that of another
+# distance. Every map gets a residual:
+#     sum over matched fragments of ((m - d) / allowed error)**2
+#     + 1 for every missing or spurious fragment
+# with d the fitted distance, so a miss costs as much as a match at the
+# edge of the tolerance. The largest fragment left is declared spurious
+# when a map places no site at it, within a budget.
+# Backtracking over every choice is exponential with errors, so this is a
+# beam search: for each number of sites only the beam_width partial maps
+# of lowest residual are extended (a map, its mirror image and maps with
+# the same distances between neighbouring sites counted once). The best
+# complete maps are kept in a bounded heap and a partial map is dropped
+# once its residual exceeds the worst of them.
+# When no partial map can be extended, a fragment was likely given to the
+# wrong distance: the next site is also tried where at most two of its
+# distances lack an unexplained fragment, those being taken back from the
+# other distances, and each end and the site next to it are tried at the
+# other unexplained fragments between them. If still no map is complete
+# and some partial maps were left out, the search is run again with a beam
+# twice as wide, up to max_beam_width, with a warning if that fails too.
+################################################################################
+
+import bisect
+import heapq
+import itertools
+import random
+import time
+import warnings
+
+import numpy as np
+
+from skiena_partial_digest import pairwise_distances
+
+def allowed_error(d, tolerance, relative_tolerance):
+    return tolerance + relative_tolerance * d
+
+def distance_range(m, tolerance, relative_tolerance):
+    """
+    The distances d a measured fragment m can come from, |m - d| <= tolerance + relative_tolerance * d.
+    """
+    return max((m - tolerance) / (1 + relative_tolerance), 0), (m + tolerance) / (1 - relative_tolerance)
+
+def match_distances(distances, slack, values, max_missing, tolerance, relative_tolerance):
+    """
+    Matches distances to different fragments at the least cost.
+    Arguments:
+        distances : numpy array of distances
+        slack : numpy array, how far each distance may be off beyond the allowed error
+        values : sorted numpy array of the fragment sizes that may be matched
+        max_missing : number of distances that may have no fragment
+    Returns:
+        cost : least sum of ((m - d) / (allowed error + slack))**2 + 1 per missing distance, inf if none
+        matched : list with the index into values of the fragment of each distance, or None if missing
+    """
+    order = np.argsort(distances, kind="stable")
+    allowed = allowed_error(distances[order], tolerance, relative_tolerance) + slack[order]
+    missing_cost = 1.0 if max_missing else np.inf
+    error = (values[None, :] - distances[order][:, None]) / allowed[:, None]
+    costs = np.where(np.abs(error) <= 1, error * error, np.inf)
+    # table[r, j]: least cost of the first r distances with fragments among the first j
+    # taken[r, j]: the same for r + 1 distances, the last of them given fragment j - 1
+    table = np.empty((len(order) + 1, len(values) + 1))
+    table[0] = 0
+    taken = np.full((len(order), len(values) + 1), np.inf)
+    for r in range(len(order)):
+        taken[r, 1:] = table[r, :-1] + costs[r]
+        table[r + 1] = np.minimum.accumulate(np.minimum(taken[r], table[r] + missing_cost))
+        if table[r + 1, -1] == np.inf:
+            return np.inf, [None] * len(order)
+    matched = [None] * len(order)
+    j = len(values)
+    for r in range(len(order), 0, -1):
+        while j > 0 and table[r, j] == table[r, j - 1]:
+            j -= 1
+        if j > 0 and table[r, j] == taken[r - 1, j]:
+            matched[order[r - 1]] = j - 1
+            j -= 1
+    if matched.count(None) > max_missing:
+        return np.inf, matched
+    return float(table[-1, -1]), matched
+
+def fit_sites(number_of_sites, matches, values, tolerance, relative_tolerance):
+    """
+    Weighted least squares positions of the sites, the origin fixed at 0.
+    Arguments:
+        number_of_sites : number of sites
+        matches : list of (i, j, sign, f): sign * (site j - site i) is the fragment values[f]
+        values : fragment sizes
+    Returns:
+        sites : numpy array of the fitted positions
+        covariance : numpy array, covariance of the fitted positions, taking the allowed error of every
+                     fragment as its standard deviation
+    """
+    i, j, sign, f = np.array(matches).T
+    rows = np.zeros((len(matches), number_of_sites))
+    rows[np.arange(len(matches)), j] = sign
+    rows[np.arange(len(matches)), i] = -sign
+    fragments = np.asarray(values, dtype=float)[f]
+    weights = 1 / allowed_error(fragments, tolerance, relative_tolerance)
+    weighted = rows[:, 1:] * weights[:, None]
+    covariance = np.zeros((number_of_sites, number_of_sites))
+    covariance[1:, 1:] = np.linalg.pinv(weighted.T @ weighted)
+    sites = np.concatenate([[0.0], covariance[1:, 1:] @ (weighted.T @ (fragments * weights))])
+    return sites, covariance
+
+def noisy_partial_digest(fragments, tolerance=0, relative_tolerance=0.0, max_missing=0, max_spurious=0,
+                         max_solutions=10, beam_width=50, refits=2, max_beam_width=800):
+    """
+    Finds the maps that best explain a noisy partial digest.
+    Arguments:
+        fragments : list of measured fragment sizes
+        tolerance : absolute error allowed on every fragment (> 0 unless relative_tolerance is)
+        relative_tolerance : error allowed in proportion to the fragment size, e.g. 0.02 for 2%
+        max_missing : number of distances of a map that may have no measured fragment
+        max_spurious : number of measured fragments that may not be distances of the map
+        max_solutions : number of maps to return
+        beam_width : number of partial maps kept for every number of sites placed
+        refits : number of times the distances of a map are matched again after placing a site
+        max_beam_width : the beam is doubled up to this width while no map is found
+    Returns:
+        solutions : list of dict with the fitted sites (sorted, starting at 0), the residual, and the missing
+                    distances and spurious fragments of each map, best first. Mirror images are not repeated.
+                    Empty only if no map fits (a warning is given if the widest beam still left some out).
+    """
+    values = sorted(fragments)
+    sizes = np.array(values, dtype=float)
+    n = len(values)
+    best = [] # heap of (-residual, tiebreak, solution), the worst kept solution on top
+    tiebreak = itertools.count()
+
+    def bound():
+        return -best[0][0] if len(best) >= max_solutions else float("inf")
+
+    def same(a, b):
+        # sorted maps with the same distances between neighbouring sites, up to the error allowed on these
+        return len(a) == len(b) and all(
+            abs((x1 - x0) - (y1 - y0)) <= allowed_error(max(x1 - x0, y1 - y0), tolerance, relative_tolerance)
+            for x0, x1, y0, y1 in zip(a, a[1:], b, b[1:]))
+
+    def record(sites, residual, missing, spurious):
+        sites = sorted(float(x) for x in sites)
+        mirror = sorted(sites[-1] - x for x in sites)
+        # the same map can be reached from other fragments; keep its best residual
+        for j, (negative_residual, _, solution) in enumerate(best):
+            if same(sites, solution["sites"]) or same(mirror, solution["sites"]):
+                if -negative_residual <= residual:
+                    return
+                best[j] = best[-1]
+                best.pop()
+                heapq.heapify(best)
+                break
+        solution = {"sites": sites, "residual": residual, "missing": sorted(missing),
+                    "spurious": sorted(values[f] for f in spurious)}
+        heapq.heappush(best, (-residual, next(tiebreak), solution))
+        if len(best) > max_solutions:
+            heapq.heappop(best)
+
+    def off(covariance, i, j):
+        # how far the fitted distances between sites i and j (arrays) can be off
+        return np.sqrt(np.clip(covariance[i, i] + covariance[j, j] - 2 * covariance[i, j], 0, None))
+
+    def fit(number_of_sites, matches, missing, spurious):
+        """
+        Fits the sites to the matches. Returns the sites, their covariance and the residual, or None if some
+        fragment is not within the allowed error of its fitted distance.
+        """
+        sites, covariance = fit_sites(number_of_sites, matches, sizes, tolerance, relative_tolerance)
+        i, j, sign, f = np.array(matches).T
+        d = sign * (sites[j] - sites[i])
+        allowed = allowed_error(d, tolerance, relative_tolerance)
+        error = sizes[f] - d
+        if np.any(np.abs(error) > allowed + off(covariance, i, j)):
+            return None
+        return sites, covariance, len(missing) + len(spurious) + float(np.sum((error / allowed) ** 2))
+
+    def refine(number_of_sites, matches, missing, spurious, fitted=None):
+        """
+        Fits the sites (unless given their fit), then matches all their distances to the fragments again and
+        refits, as a fragment taken for one distance while the sites were rough may be that of another.
+        Returns the node: sites, covariance, residual, matches, missing distances, used flags and spurious
+        fragments, or None.
+        """
+        if fitted is None:
+            fitted = fit(number_of_sites, matches, missing, spurious)
+        length = matches[0] # the DNA length stays the largest fragment that is not spurious
+        candidates = np.array([f for f in range(n) if f not in spurious and f != length[3]], dtype=int)
+        i, j = (index[1:] for index in np.triu_indices(number_of_sites, 1))
+        for refit in range(refits):
+            if fitted is None:
+                return None
+            sites, covariance, _ = fitted
+            # but for the last time, a distance too far from every fragment to be matched yet may be left
+            # out of the fit
+            loose = 2 if refit < refits - 1 else 0
+            cost, matched = match_distances(np.abs(sites[j] - sites[i]), off(covariance, i, j), sizes[candidates],
+                                            max_missing + loose, tolerance, relative_tolerance)
+            if cost == np.inf:
+                return None
+            pairs = zip(i.tolist(), j.tolist())
+            matches = [length] + [(a, b, 1 if sites[b] >= sites[a] else -1, int(candidates[f]))
+                                  for (a, b), f in zip(pairs, matched) if f is not None]
+            missing = [(a, b) for a, b, f in zip(i.tolist(), j.tolist(), matched) if f is None]
+            fitted = fit(number_of_sites, matches, missing, spurious)
+        if fitted is None:
+            return None
+        used = bytearray(n) # 1 for the fragments matched or declared spurious
+        for f in spurious:
+            used[f] = 1
+        for _, _, _, f in matches:
+            used[f] = 1
+        return fitted + (matches, missing, used, spurious)
+
+    def place(x_lo, x_hi, a, t, node, free, placements):
+        """
+        Finds where a site between x_lo and x_hi, at the fragment values[t] from site a, has its distances to
+        the other sites matched to free fragments (sorted indices into values).
+        Adds them to placements: key -> (position, [(site, fragment or None for missing)]), the key telling
+        apart the fragments taken.
+        """
+        sites, covariance, residual, matches, missing, used, spurious = node
+        k = len(sites)
+        errors = np.sqrt(np.clip(np.diag(covariance), 0, None))
+        budget = max_missing - len(missing)
+        others = [j for j in range(k) if j != a]
+        free = free[free != t]
+        free_sizes = sizes[free]
+
+        def spread(j):
+            # how precisely a fragment from site j places the new site
+            return allowed_error(max(abs(x_lo - sites[j]), abs(x_hi - sites[j])), tolerance, relative_tolerance) + errors[j]
+
+        # the new site is placed at a fragment from the site giving its position most precisely, or from the
+        # next ones while distances may be missing
+        for r in sorted(others, key=spread)[:budget + 1]:
+            # x_lo and x_hi are as far off as site a; from site r they are only as far off as the distance
+            # between a and r
+            shift = off(covariance, a, r)
+            lo, hi = x_lo + errors[a] - shift, x_hi - errors[a] + shift
+            d_lo = max(lo - sites[r], sites[r] - hi, 0)
+            d_hi = max(hi - sites[r], sites[r] - lo)
+            f = free[(free_sizes >= d_lo - allowed_error(d_lo, tolerance, relative_tolerance)) &
+                     (free_sizes <= d_hi + allowed_error(d_hi, tolerance, relative_tolerance))]
+            f = f[np.unique(sizes[f], return_index=True)[1]] # equal sizes are interchangeable
+            x = np.concatenate([sites[r] + sizes[f], sites[r] - sizes[f]])
+            f = np.concatenate([f, f])
+            reach = allowed_error(sizes[f], tolerance, relative_tolerance)
+            inside = (lo - reach <= x) & (x <= hi + reach)
+            if not inside.any():
+                continue
+            x, f, reach = x[inside], f[inside], reach[inside]
+            rest = np.array([j for j in others if j != r], dtype=int)
+            # a distance to another site is as far off as the fragment from r and the distance between the sites
+            distances = np.abs(x[:, None] - sites[rest])
+            slack = off(covariance, r, rest) + reach[:, None]
+            window = allowed_error(distances, tolerance, relative_tolerance) + slack
+            first = np.searchsorted(free_sizes, distances - window, side="left")
+            stop = np.searchsorted(free_sizes, distances + window, side="right")
+            # only the positions with a fragment within reach of all but budget distances are matched
+            for q in np.flatnonzero(np.count_nonzero(first == stop, axis=1) <= budget):
+                # the fragments within reach of some distance, but that from r
+                reachable = np.zeros(len(free) + 1, dtype=int)
+                np.add.at(reachable, first[q], 1)
+                np.add.at(reachable, stop[q], -1)
+                candidates = free[(np.cumsum(reachable[:-1]) > 0) & (free != f[q])]
+                cost, matched = match_distances(distances[q], slack[q], sizes[candidates], budget, tolerance,
+                                                relative_tolerance)
+                if cost == np.inf:
+                    continue
+                assignment = [(r, int(f[q]))] + [(j, None if g is None else int(candidates[g]))
+                                                  for j, g in zip(rest.tolist(), matched)]
+                key = (a, values[t]) + tuple(sorted((j, -1 if g is None else values[g]) for j, g in assignment))
+                placements.setdefault(key, (float(x[q]), a, t, assignment))
+
+    def grow(node, placements):
+        """
+        The fitted nodes with the site of each placement added, not matched again yet.
+        """
+        sites, covariance, residual, matches, missing, used, spurious = node
+        k = len(sites)
+        children = []
+        for x, a, t, assignment in placements.values():
+            new_matches = matches + [(a, k, 1 if x >= sites[a] else -1, t)]
+            new_missing = list(missing)
+            for j, f in assignment:
+                if f is None:
+                    new_missing.append((j, k))
+                else:
+                    new_matches.append((j, k, 1 if x >= sites[j] else -1, f))
+            fitted = fit(k + 1, new_matches, new_missing, spurious)
+            if fitted is not None and fitted[2] < bound():
+                children.append((k + 1, new_matches, new_missing, spurious, fitted))
+        return children
+
+    def expand(node):
+        """
+        The nodes with one more site, not matched again yet, or None if the node is a complete map.
+        """
+        sites, covariance, residual, matches, missing, used, spurious = node
+        top = used.rfind(0) # largest unexplained fragment
+        if top < 0:
+            record(sites, residual, [float(abs(sites[j] - sites[i])) for i, j in missing], spurious)
+            return None
+        k = len(sites)
+        placements = {}
+        if k * (k + 1) // 2 <= n - len(spurious) + max_missing: # else a new site has too many distances
+            errors = np.sqrt(np.clip(np.diag(covariance), 0, None))
+            free = np.array([f for f in range(n) if not used[f]], dtype=int)
+            # every unexplained fragment that could be the longest distance left, that of a site not placed
+            # yet to an end
+            longest = (values[top] - tolerance) / (1 + relative_tolerance)
+            lowest = longest - allowed_error(longest, tolerance, relative_tolerance)
+            tried = None
+            dna_length = sites[1]
+            for t in range(top, bisect.bisect_left(values, lowest) - 1, -1):
+                if t in spurious or used[t] or values[t] == tried:
+                    continue
+                tried = values[t]
+                y_lo, y_hi = distance_range(values[t], tolerance, relative_tolerance)
+                # site 0 is the origin and site 1 the far end; a site is placed from the end it is further from
+                anchors = [(0, 1)] if k == 2 else [(0, 1), (1, -1)]
+                if k > 2 and len(missing) < max_missing:
+                    anchors += [(a, sign) for a in range(2, k) for sign in (-1, 1)]
+                for a, sign in anchors:
+                    if sign > 0:
+                        x_lo, x_hi = sites[a] + y_lo - errors[a], sites[a] + y_hi + errors[a]
+                    else:
+                        x_lo, x_hi = sites[a] - y_hi - errors[a], sites[a] - y_lo + errors[a]
+                    x_lo, x_hi = max(x_lo, 0), min(x_hi, dna_length)
+                    if x_lo > x_hi or (a == 0 and x_hi < dna_length / 2) or (a == 1 and x_lo > dna_length / 2):
+                        continue
+                    place(x_lo, x_hi, a, t, node, free, placements)
+        children = grow(node, placements)
+        if not children and len(spurious) < max_spurious and residual + 1 < bound():
+            used = bytearray(used)
+            used[top] = 1
+            return expand((sites, covariance, residual + 1, matches, missing, used, spurious + [top]))
+        return children
+
+    def rescue(node):
+        """
+        The fitted nodes with one more site where all but two of its distances (and those that may be missing)
+        are unexplained fragments, the others taken for other distances; the match of all the distances hands
+        these out again. Unless it is the last site, it is at the largest unexplained fragment from an end.
+        """
+        sites, covariance, residual, matches, missing, used, spurious = node
+        k = len(sites)
+        unused = np.array([f for f in range(n) if not used[f]], dtype=int)
+        free = np.array([f for f in range(n) if f not in spurious and f != matches[0][3]], dtype=int)
+        # the site is at an unused fragment from some site
+        r = np.tile(np.arange(k), 2 * len(unused))
+        u = np.repeat(unused, 2 * k)
+        x = sites[r] + np.tile(np.repeat([1, -1], k), len(unused)) * sizes[u]
+        inside = (0 < x) & (x < sites[1])
+        if len(unused) >= 2 * k:
+            # more than one site is left: the next one is at the largest unexplained fragment from an end
+            far = np.maximum(x, sites[1] - x)
+            longest = sizes[unused[-1]]
+            inside &= np.abs(far - longest) <= allowed_error(far, tolerance, relative_tolerance) + \
+                allowed_error(longest, tolerance, relative_tolerance)
+        r, u, x = r[inside], u[inside], x[inside]
+        everyone = np.arange(k)
+        distances = np.abs(x[:, None] - sites)
+        slack = off(covariance, r[:, None], everyone) + \
+            allowed_error(sizes[u], tolerance, relative_tolerance)[:, None]
+        window = allowed_error(distances, tolerance, relative_tolerance) + slack
+        explained = (np.searchsorted(sizes[unused], distances + window, side="right") >
+                     np.searchsorted(sizes[unused], distances - window, side="left"))
+        placements = {}
+        for q in np.flatnonzero(np.count_nonzero(explained, axis=1) >= k - 2 - max_missing + len(missing)):
+            rest = everyone[everyone != r[q]]
+            candidates = free[free != u[q]]
+            cost, matched = match_distances(distances[q, rest], slack[q, rest], sizes[candidates],
+                                            max_missing - len(missing), tolerance, relative_tolerance)
+            if cost == np.inf:
+                continue
+            assignment = [(j, None if g is None else int(candidates[g])) for j, g in zip(rest.tolist(), matched)]
+            key = tuple(sorted([(int(r[q]), values[u[q]])] +
+                               [(j, -1 if g is None else values[g]) for j, g in assignment]))
+            placements.setdefault(key, (float(x[q]), int(r[q]), int(u[q]), assignment))
+        return grow(node, placements)
+
+    def relocate(node, j):
+        """
+        The nodes with the end j (0 or 1) moved to where an unused fragment from the nearest site puts it, or
+        that site moved to where one from the end puts it.
+        The end and that site are placed by a single short fragment between them: if that was the fragment
+        of another distance, the sites near it fit as well shifted together, until the middle of the map
+        is reached and some fragment is missing.
+        """
+        sites, covariance, residual, matches, missing, used, spurious = node
+        k = len(sites)
+        inner = np.arange(2, k)
+        r = inner[np.argmin(np.abs(sites[inner] - sites[j]))]
+        gap = abs(sites[j] - sites[r])
+        # the length fragment places the end only to its allowed error
+        reach = allowed_error(sites[1], tolerance, relative_tolerance)
+        children = []
+        for s, a in ((j, r), (r, j)):
+            # the fragments of site s, but the DNA length, are handed out anew
+            kept = [match for match in matches[1:] if s not in match[:2]]
+            kept_missing = [pair for pair in missing if s not in pair]
+            free = bytearray(used)
+            for match in matches[1:]:
+                if s in match[:2]:
+                    free[match[3]] = 0
+            free = np.array([f for f in range(n) if not free[f]], dtype=int)
+            moves = free[(np.abs(sizes[free] - gap) <= reach) &
+                         (np.abs(sizes[free] - gap) > allowed_error(gap, tolerance, relative_tolerance))]
+            others = inner if s < 2 else np.array([i for i in range(k) if i != s])
+            for u in moves:
+                x = sites[a] + sizes[u] if sites[s] > sites[a] else sites[a] - sizes[u]
+                distances = np.abs(x - sites[others])
+                slack = off(covariance, a, others) + allowed_error(sizes[u], tolerance, relative_tolerance)
+                cost, matched = match_distances(distances, slack, sizes[free], max_missing - len(kept_missing),
+                                                tolerance, relative_tolerance)
+                if cost == np.inf:
+                    continue
+                new_matches = [matches[0]] + kept
+                new_missing = list(kept_missing)
+                for i, f in zip(others.tolist(), matched):
+                    if f is None:
+                        new_missing.append((min(s, i), max(s, i)))
+                    else:
+                        new_matches.append((s, i, 1 if sites[i] >= x else -1, int(free[f])))
+                child = refine(k, new_matches, new_missing, spurious)
+                if child is not None and child[2] < bound():
+                    children.append(child)
+        return children
+
+    def search(width):
+        """
+        The beam search with width partial maps kept. Returns whether some partial map was left out for the
+        width of the beam.
+        """
+        cut = False
+        # The DNA length is the largest fragment, unless that and maybe a few more are spurious
+        beam = []
+        for k in range(min(max_spurious, n - 1) + 1):
+            top = n - 1 - k
+            root = refine(2, [(0, 1, 1, top)], [], list(range(top + 1, n)))
+            if root is not None:
+                beam.append(root)
+        while beam:
+            children = []
+            for node in beam:
+                children += expand(node) or []
+            if not children and not best:
+                # every partial map is stuck: the next site may need a fragment another distance took by
+                # mistake, or an end or the site next to it may be misplaced
+                for node in beam:
+                    children += rescue(node)
+                    if len(node[0]) > 2:
+                        for j in (0, 1):
+                            for moved in relocate(node, j):
+                                children += (expand(moved) or []) + rescue(moved)
+            # keep the best distinct maps (a map and its mirror are the same), matched again
+            children.sort(key=lambda child: child[4][2])
+            beam = []
+            kept = []
+            for number_of_sites, matches, missing, spurious, fitted in children:
+                if fitted[2] >= bound():
+                    break
+                if len(beam) == width:
+                    cut = True
+                    break
+                if distinct(fitted[0], kept):
+                    child = refine(number_of_sites, matches, missing, spurious, fitted)
+                    if child is not None and child[2] < bound() and distinct(child[0], kept):
+                        beam.append(child)
+                        kept.append(np.diff(np.sort(child[0])))
+            beam.sort(key=lambda node: node[2])
+        return cut
+
+    def distinct(sites, kept):
+        # whether no kept map (distances between neighbouring sites) is the same map or its mirror image
+        if not kept:
+            return True
+        gaps = np.diff(np.sort(sites))
+        kept = np.array(kept)
+        for g in (gaps, gaps[::-1]):
+            if np.any(np.all(np.abs(kept - g) <= allowed_error(np.maximum(kept, g), tolerance, relative_tolerance),
+                             axis=1)):
+                return False
+        return True
+
+    width = beam_width
+    while search(width) and not best:
+        if width >= max_beam_width:
+            warnings.warn("no map found with a beam of {} partial maps".format(width))
+            break
+        width = min(2 * width, max_beam_width)
+
+    return [solution for _, _, solution in sorted(best, key=lambda item: (-item[0], item[1]))]
+
+def simulated_digest(number_of_sites, dna_length, relative_error, seed, missing=0, spurious=0):
+    """
+    A random map and its partial digest as a gel would measure it.
+    Arguments:
+        number_of_sites : number of cleavage sites, both ends included
+        dna_length : position of the far end
+        relative_error : every fragment is off by a uniform factor up to this, e.g. 0.01 for 1%
+        seed : seed of the random map and errors
+        missing : number of fragments left out (never the whole DNA)
+        spurious : number of random bands added
+    Returns:
+        sites : sorted list of the cleavage sites
+        fragments : list of the measured fragment sizes, shuffled
+    """
+    rng = random.Random(seed)
+    sites = sorted([0, dna_length] + rng.sample(range(1, dna_length), number_of_sites - 2))
+    fragments = pairwise_distances(sites)
+    rng.shuffle(fragments)
+    for _ in range(missing):
+        fragments.remove(rng.choice([f for f in fragments if f != dna_length]))
+    fragments = [f * (1 + rng.uniform(-relative_error, relative_error)) for f in fragments]
+    fragments += [rng.uniform(1, dna_length) for _ in range(spurious)]
+    return sites, fragments
+
+def same_map(sites, solution, tolerance, relative_tolerance):
+    """
+    Whether the sites of a solution are those of a map, or of its mirror image, each up to the error allowed
+    on its distance from the origin.
+    """
+    dna_length = max(sites)
+    for candidate in (sorted(sites), sorted(dna_length - x for x in sites)):
+        if len(candidate) == len(solution["sites"]) and all(
+                abs(x - y) <= allowed_error(x, tolerance, relative_tolerance)
+                for x, y in zip(candidate, solution["sites"])):
+            return True
+    return False
+
+def test_noisy_partial_digest():
+    # exact digest of [0, 2, 4, 7, 10] with every fragment off by up to 0.3
+    fragments = [2.2, 1.9, 3.1, 3.0, 4.1, 5.2, 6.0, 7.3, 8.1, 10.0]
+    for solution in noisy_partial_digest(fragments, tolerance=0.5, max_solutions=3):
+        print([round(x, 2) for x in solution["sites"]], round(solution["residual"], 2))
+
+def test_missing_and_spurious():
+    # digest of [0, 2, 4, 7, 10] without one of the 3s, with a band of 9.5 from some other dna
+    fragments = [2, 2, 3, 4, 5, 6, 7, 8, 9.5, 10]
+    for solution in noisy_partial_digest(fragments, tolerance=0.1, max_missing=1, max_spurious=1,
+                                         max_solutions=3):
+        print([round(x, 2) for x in solution["sites"]], solution["missing"], solution["spurious"])
+
+def test_simulated_digest():
+    # 12 sites on 5 kb, every fragment off by up to 1%
+    sites, fragments = simulated_digest(12, 5000, 0.01, seed=7)
+    solutions = noisy_partial_digest(fragments, relative_tolerance=0.02, max_solutions=3)
+    print("map: ", sites)
+    print("best: ", [round(x) for x in solutions[0]["sites"]] if solutions else None)
+    print("recovered: ", bool(solutions) and same_map(sites, solutions[0], 0, 0.02))
+
+def test_large_simulated_digests():
+    # 20 and 25 sites on 20 kb (190 and 300 fragments), every fragment off by up to 0.5%, with a few missing
+    # and spurious ones in the last: each map should be recovered well within a minute
+    for number_of_sites, seed, missing, spurious in [(20, 120, 0, 0), (20, 1, 0, 0), (25, 120, 0, 0),
+                                                     (25, 2, 0, 0), (20, 120, 2, 2)]:
+        sites, fragments = simulated_digest(number_of_sites, 20000, 0.005, seed, missing, spurious)
+        start = time.perf_counter()
+        solutions = noisy_partial_digest(fragments, relative_tolerance=0.01, max_missing=missing,
+                                         max_spurious=spurious, max_solutions=3)
+        seconds = time.perf_counter() - start
+        recovered = bool(solutions) and same_map(sites, solutions[0], 0, 0.01)
+        print(len(fragments), "fragments, seed", seed, "recovered:", recovered, "in", round(seconds, 1), "s")
+        assert recovered and seconds < 60
+
+if __name__ == "__main__":
+    test_noisy_partial_digest()
+    test_missing_and_spurious()
+    test_simulated_digest()
+    test_large_simulated_digests()
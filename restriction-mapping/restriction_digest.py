@@ -0,0 +1,203 @@
+#####In-silico restriction digest of FASTA sequences#####
+# A restriction enzyme cuts DNA wherever its recognition site occurs. Here
+# a site is written 5' to 3' with '^' where the enzyme cuts that strand,
+# e.g. EcoRI G^AATTC, and may use the IUPAC ambiguity codes of
+# ambiguity_codes.csv (HinfI G^ANTC, N being any nucleotide). Each site is
+# expanded into the plain sequences it stands for. The enzyme also binds
+# the other strand, so a site that is not palindromic is searched for as
+# its reverse complement too, on which the cut falls at length - cut from
+# the start of the match.
+# All the sequences of a panel of enzymes go into one Aho-Corasick
+# automaton (a trie of the patterns with failure links, compiled here into
+# a transition table over A, C, G and T), so every cut site of every enzyme
+# is found in one pass over a sequence, whatever the number of patterns.
+# Any other letter (N, gaps) matches nothing and restarts the automaton.
+# The cuts give the fragments of a complete digest (between neighbouring
+# sites) and of a partial digest (between every two sites, both ends of the
+# sequence included), as consumed by the partial and double digest
+# solvers. Fragment sizes are measured on the top strand; overhangs are
+# ignored.
+# The FASTA reader and the ambiguity codes come from Midterm-CS, which
+# callers put on the import path (run as a script, this file does it).
+################################################################################
+
+import collections
+import os
+import sys
+
+from skiena_partial_digest import pairwise_distances, adjacent_distances
+
+# A few common enzymes, some with degenerate sites
+ENZYMES = {
+    "EcoRI": "G^AATTC",
+    "BamHI": "G^GATCC",
+    "HindIII": "A^AGCTT",
+    "NotI": "GC^GGCCGC",
+    "HaeIII": "GG^CC",
+    "HinfI": "G^ANTC",
+    "AvaII": "G^GWCC",
+    "StyI": "C^CWWGG",
+    "AccI": "GT^MKAC",
+    "SfiI": "GGCCNNNN^NGGCC",
+}
+
+COMPLEMENT = str.maketrans("ACGT", "TGCA")
+
+def expand_site(site, codes):
+    """
+    The plain sequences a recognition site stands for.
+    Arguments:
+        site : str of IUPAC codes, without the cut marker
+        codes : dict code -> list of nucleotides, as read by ambiguity_codes
+    Returns:
+        list of str of A, C, G and T
+    """
+    sequences = [""]
+    for code in site:
+        sequences = [sequence + nucleotide for sequence in sequences for nucleotide in codes[code]]
+    return sequences
+
+def build_automaton(enzymes, codes=None):
+    """
+    Compiles the sites of a panel of enzymes into an Aho-Corasick automaton.
+    Arguments:
+        enzymes : dict name -> site with '^' at the cut, e.g. {"EcoRI": "G^AATTC"}
+        codes : dict code -> list of nucleotides (default: read from ambiguity_codes.csv)
+    Returns:
+        transitions : list, for each state, of dict nucleotide -> next state
+        outputs : list, for each state, of (name, pattern length, cut offset) of the patterns ending there
+    """
+    if codes is None:
+        from ambiguity_codes import ambiguity_codes
+        codes = {code: [nucleotide.strip() for nucleotide in nucleotides]
+                 for code, nucleotides in ambiguity_codes().items()}
+    transitions = [{}]
+    outputs = [[]]
+    for name, marked in enzymes.items():
+        cut = marked.index("^")
+        site = marked.replace("^", "")
+        sequences = expand_site(site, codes)
+        patterns = [(sequence, cut) for sequence in sequences]
+        for sequence in sequences:
+            # the site read on the other strand; palindromic sites already match there
+            reverse = sequence.translate(COMPLEMENT)[::-1]
+            if reverse not in sequences:
+                patterns.append((reverse, len(site) - cut))
+        for pattern, offset in patterns:
+            state = 0
+            for nucleotide in pattern:
+                if nucleotide not in transitions[state]:
+                    transitions.append({})
+                    outputs.append([])
+                    transitions[state][nucleotide] = len(transitions) - 1
+                state = transitions[state][nucleotide]
+            outputs[state].append((name, len(pattern), offset))
+    # failure links, breadth first: the state of the longest proper suffix that is also in the trie;
+    # missing transitions follow them, so the scan never backtracks
+    failure = [0] * len(transitions)
+    queue = collections.deque()
+    for nucleotide in "ACGT":
+        if nucleotide in transitions[0]:
+            queue.append(transitions[0][nucleotide])
+        else:
+            transitions[0][nucleotide] = 0
+    while queue:
+        state = queue.popleft()
+        outputs[state] = outputs[state] + outputs[failure[state]]
+        for nucleotide in "ACGT":
+            if nucleotide in transitions[state]:
+                child = transitions[state][nucleotide]
+                failure[child] = transitions[failure[state]][nucleotide]
+                queue.append(child)
+            else:
+                transitions[state][nucleotide] = transitions[failure[state]][nucleotide]
+    return transitions, outputs
+
+def find_cut_sites(sequence, automaton, names):
+    """
+    Finds where each enzyme cuts a sequence, in one pass.
+    Arguments:
+        sequence : str, upper case
+        automaton : (transitions, outputs) made by build_automaton
+        names : names of the enzymes of the automaton
+    Returns:
+        cuts : dict name -> sorted list of the cut positions strictly inside the sequence
+    """
+    transitions, outputs = automaton
+    cuts = {name: set() for name in names}
+    state = 0
+    for end, nucleotide in enumerate(sequence, 1):
+        state = transitions[state].get(nucleotide, 0)
+        for name, length, offset in outputs[state]:
+            position = end - length + offset
+            if 0 < position < len(sequence):
+                cuts[name].add(position)
+    return {name: sorted(positions) for name, positions in cuts.items()}
+
+def complete_digest_fragments(cuts, length):
+    """
+    Fragments of a complete digest: between neighbouring cuts and the ends.
+    """
+    return adjacent_distances([0] + list(cuts) + [length])
+
+def partial_digest_fragments(cuts, length):
+    """
+    Fragments of a partial digest: between every two cuts or ends.
+    """
+    return pairwise_distances([0] + list(cuts) + [length])
+
+def digest_sequence(sequence, automaton, names):
+    """
+    Digests one sequence with each enzyme of the automaton on its own and with all of them together.
+    Returns:
+        digests : dict with, for each name and for "all", a dict of the "sites" (cut positions) and the
+                  "complete" and "partial" digest fragments
+    """
+    cuts = find_cut_sites(sequence, automaton, names)
+    cuts["all"] = sorted(set().union(*cuts.values()))
+    return {name: {"sites": sites,
+                   "complete": complete_digest_fragments(sites, len(sequence)),
+                   "partial": partial_digest_fragments(sites, len(sequence))}
+            for name, sites in cuts.items()}
+
+def digest_fasta(filename, enzymes=ENZYMES):
+    """
+    The main function. Digests every sequence of a FASTA file with a panel of enzymes.
+    Arguments:
+        filename : path to a FASTA file, read with read_fafsa_file.read_file
+        enzymes : dict name -> site with '^' at the cut
+    Returns:
+        results : list of [label, length, digests], digests as returned by digest_sequence
+    """
+    from read_fafsa_file import read_file
+    automaton = build_automaton(enzymes)
+    return [[label, len(sequence), digest_sequence(sequence, automaton, list(enzymes))]
+            for label, _, sequence in read_file(filename)]
+
+def test_find_cut_sites():
+    # EcoRI should cut at 3 (GAATTC), HinfI at 11 (GACTC), AccI at 19 (GTCTAC) and 27 (GTATAC),
+    # and GGTCAC, only on the other strand a site of the made up ZZZ1, at 36
+    enzymes = {"EcoRI": "G^AATTC", "HinfI": "G^ANTC", "AccI": "GT^MKAC", "ZZZ1": "GTG^ACC"}
+    sequence = "AAGAATTCAAGACTCAAGTCTACAAGTATACAAGGTCACAA"
+    print(find_cut_sites(sequence, build_automaton(enzymes), list(enzymes)))
+
+def test_digest_round_trip():
+    # the partial digest of a sequence gives back its cut sites, or their mirror image
+    from backtracking_partial_digest import backtracking_partial_digest
+    sequence = "TTGAATTCAAAAGGATCCAAAAAAAAGAATTCAAGGATCCAAT"
+    enzymes = {"EcoRI": "G^AATTC", "BamHI": "G^GATCC"}
+    digests = digest_sequence(sequence, build_automaton(enzymes), list(enzymes))
+    print("sites: ", digests["all"]["sites"])
+    print("complete: ", digests["all"]["complete"])
+    print("solved: ", backtracking_partial_digest(digests["all"]["partial"]))
+
+def test_digest_fasta():
+    filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Midterm-CS", "MidCS1.txt")
+    for label, length, digests in digest_fasta(filename)[:3]:
+        print(label, length, {name: len(digest["sites"]) for name, digest in digests.items()})
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Midterm-CS"))
+    test_find_cut_sites()
+    test_digest_round_trip()
+    test_digest_fasta()
@@ -25,6 +25,44 @@ def add_subset_elements(A, B):
 def is_equal_multi_set(A,B):
     return collections.Counter(A)==collections.Counter(B)
 
+# Fragment multisets as Counters (fragment size -> number of fragments): 
+# the subset test and the removal of the distances of a new site take 
+# O(number of sites), and putting them back is as cheap
+def take_distances(x, sites, counts):
+    """
+    Removes the distances from x to every site from the multiset counts, if all are there.
+    Arguments:
+        x : coordinate of a candidate cleavage site
+        sites : coordinates of the cleavage sites placed so far
+        counts : collections.Counter of the remaining fragments, updated in place
+    Returns:
+        removed : list of the distances removed, or None (counts unchanged) if some distance is missing
+    """
+    removed = []
+    for site in sites:
+        d = abs(x - site)
+        if counts[d] == 0:
+            put_back(removed, counts)
+            return None
+        counts[d] -= 1
+        removed.append(d)
+    return removed
+def put_back(distances, counts):
+    for d in distances:
+        counts[d] += 1
+def pairwise_distances(sites):
+    """
+    The partial digest of a map: sorted list of the distances between every two sites.
+    """
+    sites = sorted(sites)
+    return sorted(b - a for i, a in enumerate(sites) for b in sites[i+1:])
+def adjacent_distances(sites):
+    """
+    The complete digest of a map: sorted list of the distances between neighbouring sites.
+    """
+    sites = sorted(sites)
+    return sorted(b - a for a, b in zip(sites, sites[1:]))
+
 # The main function that decides one step of algorithm
 def update_fragments_and_cleavage_sites(fragments, cleavage_sites, dna_length):
     """
@@ -0,0 +1,228 @@
+########################################################################
+# Reproducible benchmark suite of the hot paths of the repository      #
+# Every benchmark builds one input per size from a generator seeded by #
+# the suite seed, the benchmark name and the size, so a run is         #
+# repeatable and does not depend on which benchmarks are selected.     #
+# Each variant of a benchmark is timed on that same input: first the   #
+# original code, then the optimized entry points that replace it, so   #
+# the speedup of every optimization is measured. Every variant is      #
+# timed a few times and the best time is kept; the rows, with the      #
+# versions and the machine they ran on, are written as JSON.           #
+#                                                                      #
+# Usage (from the top directory):                                      #
+#   python run_benchmarks.py --output benchmarks.json                  #
+#   python run_benchmarks.py --only partial_digest --sizes 10 20 40    #
+########################################################################
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+TOP = os.path.dirname(os.path.abspath(__file__))
+for directory in ("Assignment1", "Midterm-CS", "natural-selection-haploid", "restriction-mapping"):
+  sys.path.insert(0, os.path.join(TOP, directory))
+
+from file_readers import read_fasta_file
+from translate.translate import translate_simple, translate_batch
+from translate.genetic_code import genetic_code
+from hydrophobicity.trapezoid_rule_based_profile import build_hydrophobicity_profile, analyze_hydrophobicity_profile
+from hydrophobicity.trapezoid_rule_based_profile import build_hydrophobicity_profiles, analyze_hydrophobicity_profiles
+from hydrophobicity.trapezoid_rule_based_profile import OUTER_SIZE
+import read_fafsa_file
+from min_edit_distance import min_edit_distance, min_edit_distance_score, banded_edit_distance
+from hirschberg_alignment import hirschberg_alignment
+from test_primality_AKS import prime_factors
+from number_theory import factorize, random_prime
+from wright_fisher import wright_fisher
+from skiena_partial_digest import partial_digest, pairwise_distances
+from backtracking_partial_digest import backtracking_partial_digest
+
+# select_haploid plots with matplotlib and shows progress with tqdm; without them its variant is skipped
+try:
+  from select_haploid import select_haploid
+  SELECT_HAPLOID_MISSING = None
+except ImportError as error:
+  select_haploid = None
+  SELECT_HAPLOID_MISSING = str(error)
+
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+
+def random_sequence(length, alphabet, rng):
+  return "".join(rng.choice(alphabet) for _ in range(length))
+
+def write_fasta(filename, records, width=60):
+  """
+  Writes [label, sequence] records with sequence lines of the given width.
+  """
+  with open(filename, "w") as outfile:
+    for label, sequence in records:
+      outfile.write(">{}\n".format(label))
+      for start in range(0, len(sequence), width):
+        outfile.write(sequence[start:start + width] + "\n")
+
+"""
+Each input builder takes a size, a seeded random.Random and a scratch directory, and returns the input of the variants
+and a dict describing it.
+"""
+def fasta_input(size, rng, tmpdir):
+  filename = os.path.join(tmpdir, "records_{}.fa".format(size))
+  write_fasta(filename, [["gene{}".format(i), random_sequence(1000, "ACGT", rng)] for i in range(size)])
+  return filename, {"records": size, "record_length": 1000}
+
+def mRNA_input(size, rng, tmpdir):
+  # size genes of a start codon and 299 sense codons, so every gene is translated whole
+  sense = sorted(codon for codon, amino_acid in genetic_code().items() if amino_acid != "_")
+  mRNAs = ["AUG" + "".join(rng.choice(sense) for _ in range(299)) for _ in range(size)]
+  return mRNAs, {"genes": size, "codons": 300}
+
+def protein_input(size, rng, tmpdir):
+  return [random_sequence(500, AMINO_ACIDS, rng) for _ in range(size)], {"proteins": size, "residues": 500}
+
+def profile_input(size, rng, tmpdir):
+  # the profiles one by one and packed, with the lengths of the packed rows
+  proteins, parameters = protein_input(size, rng, tmpdir)
+  profiles = [build_hydrophobicity_profile(protein) for protein in proteins]
+  lengths = [max(len(protein) - 2 * OUTER_SIZE, 0) for protein in proteins]
+  return (profiles, build_hydrophobicity_profiles(proteins), lengths), parameters
+
+def sequence_pair_input(size, rng, tmpdir):
+  # Y is X with about one edit in ten, the case the band of banded_edit_distance is meant for
+  X = random_sequence(size, "ACGT", rng)
+  Y = "".join(rng.choice("ACGT") if rng.random() < 0.1 else x for x in X)
+  return (X, Y), {"length": size}
+
+def semiprime_input(size, rng, tmpdir):
+  # a product of two primes of half the bits each, the slowest input of trial division
+  n = random_prime(size // 2, rng) * random_prime(size - size // 2, rng)
+  return n, {"bits": size, "n": n}
+
+def population_input(size, rng, tmpdir):
+  # size replicates of 200 generations
+  return (size, rng.randrange(2**32)), {"replicates": size, "generations": 200, "N": 1000}
+
+def digest_input(size, rng, tmpdir):
+  # size sites, the two ends included, on a dna of 100 * size**2 bases so that few distances repeat
+  dna_length = 100 * size * size
+  sites = [0] + rng.sample(range(1, dna_length), size - 2) + [dna_length]
+  fragments = pairwise_distances(sites)
+  return fragments, {"sites": size, "fragments": len(fragments)}
+
+def select_haploid_replicates(population):
+  replicates, seed = population
+  return [select_haploid(1000, 0.5, 1.1, 1.0, gens=200, seed=[seed, r]) for r in range(replicates)]
+
+# name -> (input builder, default sizes, variants); variants is a list of (name, function of the input, reason it
+# cannot run or None), the original code first
+BENCHMARKS = {
+  "fasta_reading": (fasta_input, [100, 1000, 10000], [
+    ("read_fafsa_file.read_file", read_fafsa_file.read_file, None),
+    ("read_fasta_file.read_file", read_fasta_file.read_file, None),
+  ]),
+  "translation": (mRNA_input, [10, 100, 1000], [
+    ("translate_simple", lambda mRNAs: [translate_simple(mRNA) for mRNA in mRNAs], None),
+    ("translate_batch", translate_batch, None),
+  ]),
+  "hydrophobicity_profile": (protein_input, [10, 100, 1000], [
+    ("build_hydrophobicity_profile", lambda proteins: [build_hydrophobicity_profile(p) for p in proteins], None),
+    ("build_hydrophobicity_profiles", build_hydrophobicity_profiles, None),
+  ]),
+  "hydrophobicity_analysis": (profile_input, [10, 100, 1000], [
+    ("analyze_hydrophobicity_profile", lambda data: [analyze_hydrophobicity_profile(hp) for hp in data[0]], None),
+    ("analyze_hydrophobicity_profiles", lambda data: analyze_hydrophobicity_profiles(data[1], lengths=data[2]), None),
+  ]),
+  "edit_distance": (sequence_pair_input, [100, 200, 400], [
+    ("min_edit_distance", lambda pair: min_edit_distance(*pair), None),
+    ("min_edit_distance_score", lambda pair: min_edit_distance_score(*pair), None),
+    ("banded_edit_distance", lambda pair: banded_edit_distance(*pair), None),
+    ("hirschberg_alignment", lambda pair: hirschberg_alignment(*pair), None),
+  ]),
+  "factoring": (semiprime_input, [16, 24, 32, 40], [
+    ("prime_factors", prime_factors, None),
+    ("factorize", factorize, None),
+  ]),
+  "haploid_selection": (population_input, [1, 10, 100], [
+    ("select_haploid", select_haploid_replicates, SELECT_HAPLOID_MISSING),
+    ("wright_fisher", lambda population: wright_fisher(1000, [0.5, 0.5], [1.1, 1.0], 200, *population), None),
+  ]),
+  "partial_digest": (digest_input, [10, 20, 40, 80], [
+    ("partial_digest", lambda fragments: partial_digest(list(fragments)), None),
+    ("backtracking_partial_digest", backtracking_partial_digest, None),
+  ]),
+}
+
+def time_best(function, repeats):
+  """
+  Returns:
+    seconds : shortest of repeats timings of function()
+  """
+  best = float("inf")
+  for _ in range(repeats):
+    start = time.perf_counter()
+    function()
+    best = min(best, time.perf_counter() - start)
+  return best
+
+def run_benchmarks(names=None, sizes=None, repeats=3, seed=0):
+  """
+  Arguments:
+    names : benchmarks to run (default: all of BENCHMARKS)
+    sizes : input sizes to use instead of the default sizes of every benchmark
+    repeats : timings per variant and input, the best is kept
+    seed : seed of the inputs
+  Returns:
+    report : dict with the "environment" of the run and its "results", one row per benchmark, size and variant with
+             its "speedup" over the original code (None if that could not run); a variant that cannot run has one row
+             with the reason it was "skipped"
+  """
+  results = []
+  with tempfile.TemporaryDirectory() as tmpdir:
+    for name in names or BENCHMARKS:
+      build_input, default_sizes, variants = BENCHMARKS[name]
+      for variant, _, missing in variants:
+        if missing:
+          results.append({"benchmark": name, "variant": variant, "skipped": missing})
+      for size in sizes or default_sizes:
+        rng = random.Random("{}-{}-{}".format(seed, name, size))
+        data, parameters = build_input(size, rng, tmpdir)
+        baseline = None
+        for k, (variant, function, missing) in enumerate(variants):
+          if missing:
+            continue
+          seconds = time_best(lambda: function(data), repeats)
+          if k == 0:
+            baseline = seconds
+          results.append({"benchmark": name, "variant": variant, "size": size, "parameters": parameters,
+                          "repeats": repeats, "seconds": seconds,
+                          "speedup": baseline / seconds if baseline is not None and seconds > 0 else None})
+  environment = {
+    "seed": seed,
+    "python": platform.python_version(),
+    "numpy": np.__version__,
+    "platform": platform.platform(),
+    "processor": platform.processor(),
+  }
+  return {"environment": environment, "results": results}
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Time the hot paths of the repository on seeded synthetic inputs.")
+  parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="benchmarks to run (default: all)")
+  parser.add_argument("--sizes", type=int, nargs="+", help="input sizes to use instead of the defaults")
+  parser.add_argument("-r", "--repeats", type=int, default=3, help="timings per input, the best is kept (default: 3)")
+  parser.add_argument("-s", "--seed", type=int, default=0)
+  parser.add_argument("-o", "--output", help="write the JSON report to this file instead of printing it")
+  args = parser.parse_args()
+
+  report = run_benchmarks(args.only, args.sizes, args.repeats, args.seed)
+  if args.output:
+    with open(args.output, "w") as outfile:
+      json.dump(report, outfile, indent=2)
+  else:
+    print(json.dumps(report, indent=2))